@@ -0,0 +1,71 @@
+"""
+Measure the import time of `vssource` with its indexers and DVD stack loaded lazily, against importing them eagerly.
+
+Run with `python benchmarks/import_time.py [runs]`, every import is timed in a fresh interpreter,
+after `vstools` was imported, so only the time spent in `vssource` itself is compared.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+
+# modules `import vssource` used to import eagerly and now only imports once they're used
+LAZY_MODULES = [
+    'vssource.formats.dvd',
+    'vssource.indexers.D2VWitch',
+    'vssource.indexers.DGIndex',
+    'vssource.indexers.DGIndexNV',
+    'vssource.indexers.dvdsrc',
+    'vssource.indexers.misc'
+]
+
+
+def import_time(modules: list[str]) -> float:
+    """Return the cumulative `-X importtime` of importing `modules`, after `vstools` is already imported."""
+
+    statement = '; '.join(f'import {module}' for module in ['vstools', *modules])
+
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement], capture_output=True, text=True, check=True
+    )
+
+    total = 0
+
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        _, cumulative_us, name = line.split('|')
+
+        # nested imports are indented and already part of the cumulative time of the top level ones
+        if cumulative_us.strip().isdigit() and name[1:].startswith('vssource'):
+            total += int(cumulative_us)
+
+    return total / 1e6
+
+
+def bench(name: str, modules: list[str], runs: int) -> float:
+    best = min(import_time(modules) for _ in range(runs))
+
+    print(f'{name:<40} {best * 1000:10.1f} ms')
+
+    return best
+
+
+def main(runs: int = 5) -> None:
+    loaded = subprocess.run(
+        [sys.executable, '-c', f'import sys, vssource; print(*(m for m in {LAZY_MODULES!r} if m in sys.modules))'],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+
+    assert not loaded, f'import vssource still imports {", ".join(loaded)}'
+
+    lazy = bench('import vssource', ['vssource'], runs)
+    eager = bench('import vssource and every submodule', ['vssource', *LAZY_MODULES], runs)
+
+    print(f'{"speedup":<40} {eager / lazy:10.2f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
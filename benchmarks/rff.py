@@ -0,0 +1,228 @@
+"""
+Compare `apply_rff_video` against the old per-frame dict implementation.
+
+The field map construction is timed on its own and, if VapourSynth is available, frames of a synthetic
+soft telecined clip are rendered through the old graph, with its three ModifyFrame passes,
+and through the new one with its single prop stage, reporting frames per second.
+
+Run with `python benchmarks/rff.py [frames] [render frames] [threads]`.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import warnings
+from copy import deepcopy
+from itertools import count
+from time import perf_counter
+from timeit import repeat
+from typing import TYPE_CHECKING, Any, Callable
+
+from vssource.rff import _weave_fields, build_field_map, compress_fields
+
+if TYPE_CHECKING:
+    from vstools import vs
+
+
+def make_flags(frames: int, seed: int = 0) -> tuple[list[int], list[int], list[int], list[int]]:
+    """Soft telecined film with a cadence break every few thousand frames and some progressive sequences."""
+
+    rng = random.Random(seed)
+
+    rff, tff, prog, prog_seq = list[int](), list[int](), list[int](), list[int]()
+
+    field_parity = 1
+
+    while len(rff) < frames:
+        # multiple of the 4 frames pulldown cycle, so every segment ends on a whole field pair
+        length = rng.randint(125, 1250) * 4
+        is_prog_seq = int(rng.random() < 0.1)
+
+        for i in range(min(length, frames - len(rff))):
+            if is_prog_seq:
+                rff.append(0)
+                tff.append(1)
+            else:
+                # 2:3 pulldown, flipping the field parity on every repeated field
+                rff.append(i % 2)
+                tff.append(field_parity)
+
+                if rff[-1]:
+                    field_parity ^= 1
+
+            prog.append(1)
+            prog_seq.append(is_prog_seq)
+
+    return rff, tff, prog, prog_seq
+
+
+def old_fields(rff: list[int], tff: list[int], prog: list[int], prog_seq: list[int]) -> list[dict[str, Any]]:
+    """Field list construction of the per-frame implementation `apply_rff_video` had before the field map."""
+
+    fields = list[dict[str, Any]]()
+
+    for i, current_prg_seq, current_prg, current_rff, current_tff in zip(count(), prog_seq, prog, rff, tff):
+        if not current_prg_seq:
+            if current_tff:
+                first_field = 2 * i
+                second_field = 2 * i + 1
+            else:
+                first_field = 2 * i + 1
+                second_field = 2 * i
+
+            fields += [
+                {'n': first_field, 'tf': current_tff, 'prg': False, 'repeat': False},
+                {'n': second_field, 'tf': not current_tff, 'prg': False, 'repeat': False}
+            ]
+
+            if current_rff:
+                repeat_field = deepcopy(fields[-2])
+                repeat_field['repeat'] = True
+                fields.append(repeat_field)
+        else:
+            field_count = 1
+            if current_rff:
+                field_count += 1 + int(current_tff)
+
+            fields += [
+                {'n': 2 * i, 'tf': 1, 'prg': True, 'repeat': False},
+                {'n': 2 * i + 1, 'tf': 0, 'prg': True, 'repeat': False}
+            ] * field_count
+
+    if (len(fields) % 2) != 0:
+        fields = fields[:-1]
+
+    for tf, bf in zip(fields[::2], fields[1::2]):
+        if tf['tf'] == bf['tf']:
+            bf['tf'] = not bf['tf']
+
+    return fields
+
+
+def old_field_map(rff: list[int], tff: list[int], prog: list[int], prog_seq: list[int]) -> list[int]:
+    return [x['n'] for x in old_fields(rff, tff, prog, prog_seq)]
+
+
+def old_apply_rff_video(
+    node: vs.VideoNode, rff: list[int], tff: list[int], prog: list[int], prog_seq: list[int]
+) -> vs.VideoNode:
+    """The graph `apply_rff_video` built before the field map, a remap and three ModifyFrame passes."""
+
+    from vstools import remap_frames
+
+    fields = old_fields(rff, tff, prog, prog_seq)
+
+    tfffs = node.std.RemoveFrameProps(['_FieldBased', '_Field']).std.SeparateFields(True)
+
+    final = remap_frames(tfffs, [x['n'] for x in fields])
+
+    def _set_field(n: int, f: vs.VideoFrame) -> vs.VideoFrame:
+        f = f.copy()
+
+        f.props.pop('_FieldBased', None)
+        f.props._Field = fields[n]['tf']
+
+        return f
+
+    final = final.std.ModifyFrame(final, _set_field)
+
+    woven = final.std.DoubleWeave()[::2]
+
+    def _set_repeat(n: int, f: vs.VideoFrame) -> vs.VideoFrame:
+        f = f.copy()
+        if fields[n * 2]['repeat']:
+            f.props['RepeatedField'] = 1
+        elif fields[n * 2 + 1]['repeat']:
+            f.props['RepeatedField'] = 0
+        else:
+            f.props['RepeatedField'] = -1
+        return f
+
+    woven = woven.std.ModifyFrame(woven, _set_repeat)
+
+    def _update_progressive(n: int, f: vs.VideoFrame) -> vs.VideoFrame:
+        fout = f.copy()
+
+        if fields[n * 2]['prg'] and fields[n * 2 + 1]['prg']:
+            fout.props['_FieldBased'] = 0
+
+        return fout
+
+    return woven.std.ModifyFrame(woven, _update_progressive)
+
+
+def new_field_map(rff: list[int], tff: list[int], prog: list[int], prog_seq: list[int]) -> int:
+    """Field map, weave reorder and cadence compression of the remap, returns the amount of runs."""
+
+    woven_fields, _, _ = _weave_fields(build_field_map(rff, tff, prog, prog_seq))
+
+    return len(compress_fields(woven_fields))
+
+
+def bench(name: str, func: Callable[[], object], number: int = 3) -> float:
+    best = min(repeat(func, number=1, repeat=number))
+
+    print(f'{name:<40} {best * 1000:10.1f} ms')
+
+    return best
+
+
+def render_fps(name: str, clip: vs.VideoNode) -> float:
+    start = perf_counter()
+
+    for _ in clip.frames():
+        pass
+
+    fps = clip.num_frames / (perf_counter() - start)
+
+    print(f'{name:<40} {fps:10.1f} fps')
+
+    return fps
+
+
+def main(frames: int = 100_000, render: int = 20_000, threads: int = 8) -> None:
+    flags = make_flags(frames)
+
+    assert list(build_field_map(*flags).n) == old_field_map(*flags)
+
+    print(f'{frames} frames, {new_field_map(*flags)} field runs')
+
+    old = bench('old per-frame field list', lambda: old_field_map(*flags))
+    new = bench('build_field_map + weave + compress', lambda: new_field_map(*flags))
+
+    print(f'{"speedup":<40} {old / new:10.2f}x')
+
+    try:
+        from vstools import core, vs
+    except ImportError:
+        print('VapourSynth not available, skipping the rendering')
+        return
+
+    from vssource.rff import apply_rff_video
+
+    core.num_threads = threads
+
+    render_flags = make_flags(render, 1)
+
+    # DVD sized, so the field separation and weaving cost what they do on real sources
+    clip = core.std.BlankClip(format=vs.YUV420P8, width=720, height=480, length=render)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+
+        old_clip = old_apply_rff_video(clip, *render_flags)
+        new_clip = apply_rff_video(clip, *render_flags)
+
+    assert old_clip.num_frames == new_clip.num_frames
+
+    print(f'{new_clip.num_frames} output frames, {threads} threads')
+
+    old_fps = render_fps('old remap + three ModifyFrame passes', old_clip)
+    new_fps = render_fps('apply_rff_video', new_clip)
+
+    print(f'{"speedup":<40} {new_fps / old_fps:10.2f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:4]))
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import random
+from typing import Sequence
+
+import pytest
+
+from vstools import CustomRuntimeError, CustomValueError
+
+from vssource import rff
+from vssource.rff import FieldRun, _weave_fields, build_field_map, compress_fields, remap_field_runs
+
+
+class _FakeClip:
+    """Clip of the source field numbers, with the slicing and the std functions `remap_field_runs` uses."""
+
+    def __init__(self, frames: Sequence[int]) -> None:
+        self.frames = list(frames)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, idx: slice) -> _FakeClip:
+        assert 0 <= idx.start < idx.stop <= len(self), 'invalid clip slice'
+
+        return _FakeClip(self.frames[idx])
+
+    @property
+    def std(self) -> _FakeClip:
+        return self
+
+    def SelectEvery(self, cycle: int, offsets: int | Sequence[int], modify_duration: bool = True) -> _FakeClip:
+        if cycle < 2:
+            raise ValueError('SelectEvery: invalid cycle size (must be greater than 1)')
+
+        offsets = [offsets] if isinstance(offsets, int) else list(offsets)
+
+        return _FakeClip([
+            self.frames[i + offset] for i in range(0, len(self), cycle) for offset in offsets if i + offset < len(self)
+        ])
+
+
+class _FakeStd:
+    @staticmethod
+    def Interleave(clips: list[_FakeClip], modify_duration: bool = True) -> _FakeClip:
+        assert len({len(clip) for clip in clips}) == 1
+
+        return _FakeClip([frame for frames in zip(*(clip.frames for clip in clips)) for frame in frames])
+
+    @staticmethod
+    def Splice(clips: list[_FakeClip]) -> _FakeClip:
+        return _FakeClip([frame for clip in clips for frame in clip.frames])
+
+
+class _FakeCore:
+    std = _FakeStd()
+
+
+@pytest.fixture
+def fake_core(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(rff, 'core', _FakeCore())
+
+
+def _expand(runs: Sequence[FieldRun]) -> list[int]:
+    return [run.start + run.cycle * i + offset for run in runs for i in range(run.count) for offset in run.offsets]
+
+
+def _remap(fields: Sequence[int]) -> list[int]:
+    source = _FakeClip(range(max(fields) + 1))
+
+    return remap_field_runs(source, compress_fields(fields)).frames  # type: ignore[arg-type,attr-defined]
+
+
+def _random_flags(rng: random.Random, frames: int) -> tuple[list[int], ...]:
+    rff_flags, tff, prog, prog_seq = list[int](), list[int](), list[int](), list[int]()
+
+    while len(rff_flags) < frames:
+        is_prog_seq = int(rng.random() < 0.3)
+
+        for _ in range(rng.randint(1, 40)):
+            rff_flags.append(int(rng.random() < 0.5))
+            tff.append(int(rng.random() < 0.5))
+            prog.append(1)
+            prog_seq.append(is_prog_seq)
+
+    return rff_flags[:frames], tff[:frames], prog[:frames], prog_seq[:frames]
+
+
+@pytest.mark.parametrize('fields', [
+    [8, 9, 11, 9, 10, 12],
+    [5, 5, 6, 6, 7, 7],
+    [0, 1, 2, 3, 4, 5, 6, 7],
+    [1, 0, 3, 2, 5, 4, 5, 4],
+    [3, 3]
+])
+def test_remap_field_runs(fake_core: None, fields: list[int]) -> None:
+    assert _expand(compress_fields(fields)) == fields
+    assert _remap(fields) == fields
+
+
+@pytest.mark.filterwarnings('ignore:Invalid field transition')
+@pytest.mark.filterwarnings('ignore:uneven amount of fields')
+def test_remap_field_runs_random_streams(fake_core: None) -> None:
+    rng = random.Random(0)
+
+    for _ in range(500):
+        try:
+            fields = build_field_map(*_random_flags(rng, rng.randint(1, 300)))
+        except CustomRuntimeError:
+            continue
+
+        woven_fields = list(_weave_fields(fields)[0])
+
+        assert _expand(compress_fields(woven_fields)) == woven_fields
+        assert _remap(woven_fields) == woven_fields
+
+
+def test_remap_field_runs_empty() -> None:
+    with pytest.raises(CustomValueError):
+        remap_field_runs(_FakeClip([0]), [])  # type: ignore[arg-type]
+
+
+def test_compress_fields_flat_stream() -> None:
+    assert compress_fields(range(10_000)) == [FieldRun(0, 1, (0,), 10_000)]
@@ -1,3 +1,35 @@
-from .formats import *  # noqa: F401,F403
-from .funcs import *  # noqa: F401,F403
-from .indexers import *  # noqa: F401,F403
+# ruff: noqa: F401, F403, F405
+
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+from . import formats, indexers
+from .funcs import *
+
+if TYPE_CHECKING:
+    from .formats import *
+    from .indexers import *
+
+# forwarded to the subpackages, which only import their heavy modules once used
+__getattr__, __dir__ = lazy_exports(__name__, {
+    '.formats': formats.__all__,
+    '.indexers': indexers.__all__
+})
+
+__all__ = [
+    'parse_video_filepath', 'source', 'source_many',
+
+    'VideoProbe', 'probe_video',
+
+    'DiscInfoCache', 'disc_info_cache', 'IsoFile', 'Title', 'parsedvd',
+
+    'Indexer', 'ExternalIndexer', 'DVDIndexer', 'DVDExtIndexer',
+    'VSSourceFunc', 'LazySourceFunc', 'IndexProgress', 'IndexProgressCallback',
+
+    'IndexInfoCache', 'index_info_cache',
+
+    'FileSignature', 'IndexerResult', 'IndexerCapabilities', 'indexer_capabilities',
+
+    'D2VWitch', 'DGIndex', 'DGIndexNV', 'DVDSRCIndexer',
+    'BestSource', 'IMWRI', 'LSMAS', 'CarefulSource', 'FFMS2'
+]
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import Any, Callable, Iterable
+
+__all__ = [
+    'lazy_exports'
+]
+
+
+class _LazyModule(ModuleType):
+    _lazy_exports: frozenset[str]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # importing a submodule binds it on the package, which would shadow an export with the same name
+        if name in self._lazy_exports and isinstance(value, ModuleType) and value.__name__ == f'{self.__name__}.{name}':
+            value = getattr(value, name)
+
+        super().__setattr__(name, value)
+
+
+def lazy_exports(
+    package: str, exports: dict[str, Iterable[str]]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    PEP 562 lazy loading for a package.
+
+    :param package:     `__name__` of the package.
+    :param exports:     Names exported by each (relative) module, which is only imported
+                        the first time one of them is accessed.
+
+    :return:            The `__getattr__` and the `__dir__` of the package.
+    """
+
+    modules = {name: module for module, names in exports.items() for name in names}
+
+    module_obj = sys.modules[package]
+    module_obj._lazy_exports = frozenset(modules)  # type: ignore[attr-defined]
+    module_obj.__class__ = _LazyModule
+
+    def __getattr__(name: str) -> Any:
+        if (module := modules.get(name)) is None:
+            # the lazy submodules themselves, which used to be imported eagerly
+            if f'.{name}' in exports:
+                return import_module(f'.{name}', package)
+
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+
+        value = getattr(import_module(module, package), name)
+
+        # next lookups won't go through here anymore
+        setattr(sys.modules[package], name, value)
+
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*vars(sys.modules[package]), *modules})
+
+    return __getattr__, __dir__
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass, field
 from fractions import Fraction
-from typing import Union
+from typing import Iterator, Sequence, SupportsIndex, Union, overload
 
-from vstools import SPath
+from vstools import SPath, vs
 
 __all__ = [
     'IndexFileFrameData',
@@ -12,15 +13,21 @@ __all__ = [
 
     'D2VIndexHeader',
     'D2VIndexFrameData',
+    'D2VIndexColumns',
 
     'DGIndexHeader',
     'DGIndexFrameData',
+    'DGIndexColumns',
     'DGIndexFooter',
 
     'D2VIndexFileInfo',
     'DGIndexFileInfo',
 
-    'AllNeddedDvdFrameData'
+    'AllNeddedDvdFrameData',
+    'PackedDvdFrameData',
+
+    'D2VVTSData',
+    'DVDSRCVTSData'
 ]
 
 
@@ -71,6 +78,27 @@ class D2VIndexFrameData(IndexFileFrameData):
     frameflags: list[int]
 
 
+@dataclass
+class D2VIndexColumns:
+    """Frame data of a d2v index stored column-wise, one row per GOP line."""
+
+    info: Sequence[int]
+    matrix: Sequence[int]
+    file: Sequence[int]
+    position: Sequence[int]
+    skip: Sequence[int]
+    vob: Sequence[int]
+    cell: Sequence[int]
+    flags_offsets: Sequence[int]
+    flags: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.info)
+
+    def get_frameflags(self, row: int) -> Sequence[int]:
+        return self.flags[self.flags_offsets[row]:self.flags_offsets[row + 1]]
+
+
 @dataclass
 class DGIndexHeader(_SetItemMeta):
     device: int = 0
@@ -90,6 +118,19 @@ class DGIndexFrameData(IndexFileFrameData):
     cell: int | None
 
 
+@dataclass
+class DGIndexColumns:
+    """Frame data of a dgi index stored column-wise, vob and cell are -1 where missing."""
+
+    matrix: Sequence[int]
+    pic_type: Sequence[str]
+    vob: Sequence[int]
+    cell: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+
 @dataclass
 class DGIndexFooter(_SetItemMeta):
     film: float = 0.0
@@ -116,8 +157,140 @@ IndexFileType = Union[D2VIndexFileInfo, DGIndexFileInfo]
 
 @dataclass
 class AllNeddedDvdFrameData:
+    vobids: Sequence[tuple[int, int]]
+    tff: Sequence[int]
+    rff: Sequence[int]
+    prog: Sequence[int]
+    progseq: Sequence[int]
+
+
+# Bit layout of the frame status byte as dvdsrc2 packs it
+_TFF_BIT, _RFF_BIT, _PROG_BIT, _PROGSEQ_BIT = range(4)
+
+_FLAG_LUTS = tuple(bytes((i >> bit) & 1 for i in range(256)) for bit in range(8))
+
+
+class _PackedFlagsView(Sequence[int]):
+    __slots__ = ('_flags', '_bit')
+
+    def __init__(self, flags: bytes, bit: int) -> None:
+        self._flags = flags
+        self._bit = bit
+
+    def __len__(self) -> int:
+        return len(self._flags)
+
+    @overload
+    def __getitem__(self, idx: SupportsIndex, /) -> int:
+        ...
+
+    @overload
+    def __getitem__(self, idx: slice, /) -> _PackedFlagsView:
+        ...
+
+    def __getitem__(self, idx: SupportsIndex | slice) -> int | _PackedFlagsView:
+        if isinstance(idx, slice):
+            return _PackedFlagsView(self._flags[idx], self._bit)
+
+        return (self._flags[idx] >> self._bit) & 1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(bytes(self))
+
+    def __bytes__(self) -> bytes:
+        return self._flags.translate(_FLAG_LUTS[self._bit])
+
+
+class _VobCellIdsView(Sequence[tuple[int, int]]):
+    __slots__ = ('_vob_ids', '_cell_ids')
+
+    def __init__(self, vob_ids: array[int], cell_ids: bytes) -> None:
+        self._vob_ids = vob_ids
+        self._cell_ids = cell_ids
+
+    def __len__(self) -> int:
+        return len(self._cell_ids)
+
+    @overload
+    def __getitem__(self, idx: SupportsIndex, /) -> tuple[int, int]:
+        ...
+
+    @overload
+    def __getitem__(self, idx: slice, /) -> _VobCellIdsView:
+        ...
+
+    def __getitem__(self, idx: SupportsIndex | slice) -> tuple[int, int] | _VobCellIdsView:
+        if isinstance(idx, slice):
+            return _VobCellIdsView(self._vob_ids[idx], self._cell_ids[idx])
+
+        return (self._vob_ids[idx], self._cell_ids[idx])
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return zip(self._vob_ids, self._cell_ids)
+
+
+@dataclass
+class PackedDvdFrameData:
+    """Array backed AllNeddedDvdFrameData, the per-flag and vob/cell id sequences are views over it."""
+
+    flags: bytes
+    vob_ids: array[int]
+    cell_ids: bytes
+
+    @property
+    def vobids(self) -> Sequence[tuple[int, int]]:
+        return _VobCellIdsView(self.vob_ids, self.cell_ids)
+
+    @property
+    def tff(self) -> Sequence[int]:
+        return _PackedFlagsView(self.flags, _TFF_BIT)
+
+    @property
+    def rff(self) -> Sequence[int]:
+        return _PackedFlagsView(self.flags, _RFF_BIT)
+
+    @property
+    def prog(self) -> Sequence[int]:
+        return _PackedFlagsView(self.flags, _PROG_BIT)
+
+    @property
+    def progseq(self) -> Sequence[int]:
+        return _PackedFlagsView(self.flags, _PROGSEQ_BIT)
+
+    def cut(self, ranges: Sequence[tuple[int, int]]) -> PackedDvdFrameData:
+        """Frame data of the inclusive frame ranges, one after the other."""
+
+        vob_ids = array(self.vob_ids.typecode)
+
+        for start, end in ranges:
+            vob_ids.extend(self.vob_ids[start:end + 1])
+
+        return PackedDvdFrameData(
+            b''.join(self.flags[start:end + 1] for start, end in ranges),
+            vob_ids,
+            b''.join(self.cell_ids[start:end + 1] for start, end in ranges)
+        )
+
+
+@dataclass
+class D2VVTSData:
+    """Frame data of the index of a whole VTS, shared between its titles."""
+
+    node: vs.VideoNode
+    frameflags: list[int]
     vobids: list[tuple[int, int]]
-    tff: list[int]
-    rff: list[int]
-    prog: list[int]
     progseq: list[int]
+
+    # (vob_id, cell_id) -> inclusive frame ranges
+    frameset: dict[tuple[int, int], list[tuple[int, int]]]
+
+
+@dataclass
+class DVDSRCVTSData:
+    """Decoded whole VTS and its frame data, shared between its titles."""
+
+    node: vs.VideoNode
+    data: PackedDvdFrameData
+
+    # (vob_id, cell_id) -> inclusive frame ranges
+    frameset: dict[tuple[int, int], list[tuple[int, int]]]
@@ -1,2 +1,21 @@
-from .bd import *  # noqa: F401,F403
-from .dvd import *  # noqa: F401,F403
+# ruff: noqa: F401, F403, F405
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+from .bd import *
+from .probe import *
+
+if TYPE_CHECKING:
+    from .dvd import *
+
+# the dvd parsing stack is only imported once it's used
+__getattr__, __dir__ = lazy_exports(__name__, {
+    '.dvd': ['DiscInfoCache', 'disc_info_cache', 'IsoFile', 'Title', 'parsedvd']
+})
+
+__all__ = [
+    'VideoProbe', 'probe_video',
+
+    'DiscInfoCache', 'disc_info_cache', 'IsoFile', 'Title', 'parsedvd'
+]
@@ -3,48 +3,136 @@ from __future__ import annotations
 import datetime
 import json
 import os
+import random
+import shutil
 import warnings
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from fractions import Fraction
+from functools import cache, partial
+from hashlib import blake2b
 from itertools import count
 from tempfile import gettempdir
-from typing import Sequence, cast
+from threading import Lock, RLock
+from typing import Any, Callable, Iterable, Iterator, Literal, Sequence, cast, overload
 
-from vstools import CustomValueError, DependencyNotFoundError, Region, SPath, SPathLike, core, vs
+from vstools import CustomValueError, DependencyNotFoundError, Region, SPath, core, vs
 
-from ...indexers import DVDExtIndexer, DVDSRCIndexer, ExternalIndexer
+from ...indexers import DVDExtIndexer, DVDSRCIndexer, ExternalIndexer, Indexer
 from ...rff import apply_rff_video
 from ...utils import debug_print
+from .cache import disc_info_cache
 from .parsedvd import (
     AUDIO_FORMAT_AC3, AUDIO_FORMAT_LPCM, BLOCK_MODE_FIRST_CELL, BLOCK_MODE_IN_BLOCK, BLOCK_MODE_LAST_CELL, IFO0, IFOX,
-    SectorReadHelper, to_json
+    SectorReadHelper, ifo0_to_json, ifox_to_json, to_json
 )
 from .title import Title
-from .utils import absolute_time_from_timecode, double_check_dvdnav
+from .utils import DvdnavChapterCheck, absolute_time_from_timecode, check_dvdnav_chapters, find_json_mismatch
 
 __all__ = [
     'IsoFileCore'
 ]
 
 
+_dvdnav_executor: ThreadPoolExecutor | None = None
+_dvdnav_executor_lock = Lock()
+
+
+# Amount of VTS IFOs compared against libdvdread on discs checked with `validation='sampled'`
+_VALIDATION_SAMPLES = 2
+
+
+class _LazyVTSList(Sequence[IFOX]):
+    """VTS IFOs of a disc, each only parsed the first time it's accessed."""
+
+    def __init__(self, count: int, load: Callable[[int], IFOX], parsed: dict[int, IFOX] | None = None) -> None:
+        self._count = count
+        self._load = load
+        self._parsed = dict(parsed or {})
+        self._lock = RLock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, idx: int) -> IFOX:
+        ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> list[IFOX]:
+        ...
+
+    def __getitem__(self, idx: int | slice) -> IFOX | list[IFOX]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self._count))]
+
+        if idx < 0:
+            idx += self._count
+
+        if not 0 <= idx < self._count:
+            raise IndexError('VTS index out of range')
+
+        # title set numbers are 1-index based
+        title_set_nr = idx + 1
+
+        with self._lock:
+            if title_set_nr not in self._parsed:
+                self._parsed[title_set_nr] = self._load(title_set_nr)
+
+            return self._parsed[title_set_nr]
+
+    def __iter__(self) -> Iterator[IFOX]:
+        return iter(self.materialize())
+
+    def materialize(self) -> list[IFOX]:
+        """Parse every VTS IFO not parsed yet and return all of them."""
+
+        return self[:]
+
+    @property
+    def parsed(self) -> dict[int, IFOX]:
+        """VTS IFOs parsed so far, by title set number."""
+
+        with self._lock:
+            return dict(self._parsed)
+
+    def __repr__(self) -> str:
+        return repr(self.materialize())
+
+
 class IsoFileCore:
     _subfolder = 'VIDEO_TS'
 
     ifo0: IFO0
-    vts: list[IFOX]
+    vts: Sequence[IFOX]
+    fingerprint: str
     indexer: DVDSRCIndexer | DVDExtIndexer
     title_count: int
 
     def __init__(
         self, path: SPath | str,
         indexer: DVDExtIndexer | type[DVDExtIndexer] | None = None,
+        validation: Literal['off', 'sampled', 'always'] = 'sampled',
+        dvdnav_check: Literal['off', 'lazy', 'background'] = 'background'
     ):
         """
         Only external indexer supported D2VWitch and DGIndex
 
         If the indexer is None, dvdsrc is used
+
+        :param validation:      Cross-check of the parsed IFOs against libdvdread, if the dvdsrc plugin is available.
+                                'off' never runs it, 'sampled' only runs it on discs that weren't checked before,
+                                in this or an earlier run (see `DiscInfoCache.validation_disk`), and only compares
+                                the VMG IFO and a few VTS IFOs, the ones already parsed and up to
+                                `_VALIDATION_SAMPLES` picked at random per disc, so the rest stay unparsed.
+                                'always' compares every IFO on every open.
+        :param dvdnav_check:    Check of the chapters of opened titles against dvdnav, if its test binary is available.
+                                'lazy' only runs it when `Title.dvdnav_check` is accessed and 'background' starts it
+                                in a worker thread as soon as the title is opened. Mismatches are reported as warnings.
         """
         self.force_root = False
+        self.validation = validation
+        self.dvdnav_check = dvdnav_check
         self.output_folder = SPath(gettempdir())
 
         self._mount_path: SPath | None = None
@@ -61,30 +149,23 @@ class IsoFileCore:
         if not self.iso_path.exists():
             raise CustomValueError('"path" needs to point to a .ISO or a dir root of DVD!', str(path), self.__class__)
 
-        ifo0: IFO0 | None = None
-        ifos: Sequence[SPathLike | bytes] = []
-        if indexer is None:
-            def _getifo(i: int) -> bytes:
-                return cast(bytes, core.dvdsrc2.Ifo(str(self.iso_path), i))
+        self._use_dvdsrc_ifo = indexer is None
 
-            _ifo0b = _getifo(0)
+        self.fingerprint = self._get_fingerprint()
 
-            # remove in 2025
-            if len(_ifo0b) <= 30:
-                warnings.warn('Newer VapourSynth is required for dvdsrc2 information gathering without mounting!')
-            else:
-                ifo0 = IFO0(SectorReadHelper(_ifo0b))
-                ifos = [_getifo(i) for i in range(1, ifo0.num_vts + 1)]
+        if (cached := disc_info_cache.get(self.fingerprint)) is not None:
+            self.ifo0, parsed_vts = cached
+        else:
+            self.ifo0, parsed_vts = IFO0(self._read_ifo(0)), {}
 
-        if not ifo0:
-            _ifo0p, *ifos = self.ifo_files
-            ifo0 = IFO0(SectorReadHelper(_ifo0p))
+            disc_info_cache.set(self.fingerprint, self.ifo0, parsed_vts)
 
-        self.ifo0 = ifo0
-        self.vts = [IFOX(SectorReadHelper(ifo)) for ifo in ifos]
+        self.vts = _LazyVTSList(self.ifo0.num_vts, self._load_vts, parsed_vts)
 
         self._double_check_json()
 
+        disc_info_cache.flush(self.fingerprint)
+
         self.dvdsrc = DVDSRCIndexer()
         self.dvdsrc.iso_path = self.iso_path
 
@@ -96,6 +177,39 @@ class IsoFileCore:
 
         self.title_count = len(self.ifo0.tt_srpt)
 
+    def _get_fingerprint(self) -> str:
+        hasher = blake2b(digest_size=16)
+
+        if self.iso_path.is_dir():
+            for file in sorted(self._mount_folder_path().glob('*.[iI][fF][oO]')):
+                hasher.update(file.name.upper().encode())
+                hasher.update(Indexer.get_file_fingerprint(file))
+        else:
+            hasher.update(Indexer.get_file_fingerprint(self.iso_path))
+
+        return hasher.hexdigest()
+
+    def _read_ifo(self, i: int) -> SectorReadHelper:
+        if self._use_dvdsrc_ifo:
+            ifo = cast(bytes, core.dvdsrc2.Ifo(str(self.iso_path), i))
+
+            # remove in 2025
+            if len(ifo) > 30:
+                return SectorReadHelper(ifo)
+
+            warnings.warn('Newer VapourSynth is required for dvdsrc2 information gathering without mounting!')
+
+            self._use_dvdsrc_ifo = False
+
+        return SectorReadHelper(self.ifo_files[i])
+
+    def _load_vts(self, title_set_nr: int) -> IFOX:
+        vts = IFOX(self._read_ifo(title_set_nr))
+
+        disc_info_cache.set_vts(self.fingerprint, title_set_nr, vts)
+
+        return vts
+
     def get_vts(self, title_set_nr: int = 1, d2v_our_rff: bool = False) -> vs.VideoNode:
         """
         Gets a full vts.
@@ -133,6 +247,58 @@ class IsoFileCore:
                                     1 Calculate per frame durations based on rff;
                                     2 Set average fps on global clip;
         """
+
+        return self._get_title(title_nr, angle_nr, rff_mode)
+
+    def get_titles(
+        self, titles: Iterable[int | tuple[int, int | None]] | None = None, rff_mode: int = 0
+    ) -> list[Title]:
+        """
+        Gets several titles at once.
+
+        Titles are grouped by VTS and the indexer collects the frame data of each VTS only once,
+        every title and angle of that VTS is then cut out of it by its vob/cell ids.
+        With dvdsrc this decodes the whole VTS, instead of only the VOBUs of the title like `get_title`.
+
+        :param titles:              Titles to get, as title_nr or (title_nr, angle_nr), 1-index based.
+                                    Defaults to every title, with every angle of multi angle titles.
+        :param rff_mode:            Same as in `get_title`.
+
+        :return:                    The titles, in the requested order.
+        """
+
+        if titles is None:
+            requests = [
+                (title_nr, None if tt.nr_of_angles == 1 else angle_nr)
+                for title_nr, tt in enumerate(self.ifo0.tt_srpt, 1)
+                for angle_nr in range(1, tt.nr_of_angles + 1)
+            ]
+        else:
+            requests = [(title, None) if isinstance(title, int) else title for title in titles]
+
+        by_vts = dict[int, list[int]]()
+
+        for i, (title_nr, _) in enumerate(requests):
+            if not 1 <= title_nr <= len(self.ifo0.tt_srpt):
+                raise CustomValueError('"title_nr" out of range', self.get_titles)
+
+            by_vts.setdefault(self.ifo0.tt_srpt[title_nr - 1].title_set_nr, []).append(i)
+
+        out = dict[int, Title]()
+
+        for title_set_nr, idxs in by_vts.items():
+            vts_data = self.indexer.get_vts_data(
+                title_set_nr, self.vts[title_set_nr - 1], self.output_folder, self._get_indexer_vob_files(title_set_nr)
+            )
+
+            for i in idxs:
+                out[i] = self._get_title(*requests[i], rff_mode, vts_data)
+
+        return [out[i] for i in range(len(requests))]
+
+    def _get_title(
+        self, title_nr: int = 1, angle_nr: int | None = None, rff_mode: int = 0, vts_data: Any = None
+    ) -> Title:
         # TODO: assert angle_nr range
         disable_rff = rff_mode >= 1
 
@@ -212,7 +378,7 @@ class IsoFileCore:
 
         rnode, rff, vobids, dvdsrc_ranges = self.indexer.parse_vts(
             tt, disable_rff, vobidcellids_to_take, target_vts, self.output_folder,
-            [] if isinstance(self.indexer, DVDSRCIndexer) else self._get_title_vob_files_for_vts(tt.title_set_nr)
+            self._get_indexer_vob_files(tt.title_set_nr), vts_data
         )
 
         region = Region.from_framerate(rnode.fps)
@@ -270,37 +436,10 @@ class IsoFileCore:
             else:
                 output_chapters.append(changes[last_chapter_i])
 
-        dvnavchapters = double_check_dvdnav(self.iso_path, title_idx + 1)
-
-        if dvnavchapters is not None:  # and (rff_mode == 0 or rff_mode == 2):
-            # ???????
-            if rfps.denominator == 1001:
-                dvnavchapters = [a * 1.001 for a in dvnavchapters]
-
-            adjusted = [absolutetime[i] if i != len(
-                absolutetime) else absolutetime[i - 1] + durationcodes[i - 1] for i in output_chapters]
-            if len(adjusted) != len(dvnavchapters):
-                warnings.warn(
-                    'dvdnavchapters length do not match our chapters '
-                    f'{len(adjusted)} {len(dvnavchapters)} (open an issue in github)'
-                )
-                print(adjusted, '\n\n\n', dvnavchapters)
-            else:
-                framelen = rfps.denominator / rfps.numerator
-                for i in range(len(adjusted)):
-                    # tolerance no idea why so big
-                    # on hard telecine ntcs it matches up almost perfectly
-                    # but on ~24p pal rffd it does not lol
-                    if abs(adjusted[i] - dvnavchapters[i]) > framelen * 20:
-                        warnings.warn(
-                            f'dvdnavchapters do not match our chapters {len(adjusted)} {len(dvnavchapters)}'
-                            ' (open an issue in github)\n'
-                            f' index: {i} {adjusted[i]}'
-                        )
-                        print(adjusted, '\n\n\n', dvnavchapters)
-                        break
-        else:
-            debug_print("Skipping sanity check with dvdnav")
+        dvdnav_check = self._get_dvdnav_check(title_idx + 1, [
+            float(absolutetime[i] if i != len(absolutetime) else absolutetime[i - 1] + durationcodes[i - 1])
+            for i in output_chapters
+        ], rfps)
 
         patched_end_chapter = None
         # only the chapter | are defined by dvd
@@ -339,9 +478,35 @@ class IsoFileCore:
         return Title(
             rnode, output_chapters, changes, self, title_idx, tt.title_set_nr,
             vobidcellids_to_take, dvdsrc_ranges, absolutetime, durationcodesf,
-            audios, patched_end_chapter
+            audios, patched_end_chapter, dvdnav_check
         )
 
+    def _get_dvdnav_check(
+        self, title_nr: int, chapters: list[float], fps: Fraction
+    ) -> Callable[[], DvdnavChapterCheck] | None:
+        if self.dvdnav_check == 'off' or not shutil.which('dvdsrc_dvdnav_title_ptt_test'):
+            debug_print("Skipping sanity check with dvdnav")
+            return None
+
+        check = partial(check_dvdnav_chapters, self.iso_path, title_nr, chapters, fps, self.fingerprint)
+
+        if self.dvdnav_check == 'lazy':
+            return cache(check)
+
+        global _dvdnav_executor
+
+        with _dvdnav_executor_lock:
+            if _dvdnav_executor is None:
+                _dvdnav_executor = ThreadPoolExecutor(thread_name_prefix='vssource_dvdnav')
+
+        return _dvdnav_executor.submit(check).result
+
+    def _get_indexer_vob_files(self, vts: int) -> Sequence[SPath]:
+        if isinstance(self.indexer, DVDSRCIndexer):
+            return []
+
+        return self._get_title_vob_files_for_vts(vts)
+
     def _get_title_vob_files_for_vts(self, vts: int) -> Sequence[SPath]:
         return [
             vob for vob in self.vob_files
@@ -457,28 +622,57 @@ class IsoFileCore:
         raise NotImplementedError()
 
     def _double_check_json(self) -> None:
-        if hasattr(core, 'dvdsrc'):
-            our_json = to_json(self.ifo0, self.vts)
+        if self.validation == 'off':
+            return
+
+        if not hasattr(core, 'dvdsrc'):
+            debug_print('We don\'t have dvdsrc and can\'t double check the json output with libdvdread.')
+            return
+
+        validated, mismatch = disc_info_cache.get_validation(self.fingerprint)
+
+        if validated and self.validation == 'sampled':
+            if mismatch is not None:
+                warnings.warn(f'libdvdread json does not match python implentation at {mismatch}')
 
-            dvdsrc_json = json.loads(cast(str, core.dvdsrc.Json(str(self.iso_path))))
+            return
 
-            for key in ('dvdpath', 'current_vts', 'current_domain'):
-                dvdsrc_json.pop(key, None)
+        dvdsrc_json = json.loads(cast(str, core.dvdsrc.Json(str(self.iso_path))))
 
-            for ifo in dvdsrc_json.get('ifos', []):
-                ifo['pgci_ut'] = []
+        for key in ('dvdpath', 'current_vts', 'current_domain'):
+            dvdsrc_json.pop(key, None)
 
-            ja = json.dumps(dvdsrc_json, sort_keys=True)
-            jb = json.dumps(our_json, sort_keys=True)
+        for ifo in dvdsrc_json.get('ifos', []):
+            ifo['pgci_ut'] = []
 
-            if ja != jb:
-                warnings.warn(
-                    f'libdvdread json does not match python implentation\n'
-                    f'json a,b have been written to {self.output_folder}'
-                )
+        num_vts = len(self.vts)
+        dvdsrc_ifos = list(dvdsrc_json.get('ifos', []))
 
-                for k, v in [('a', ja), ('b', jb)]:
-                    with open(os.path.join(self.output_folder, f'{k}.json'), 'wt') as file:
-                        file.write(v)
+        if self.validation == 'always' or len(dvdsrc_ifos) != num_vts + 1:
+            our_json = to_json(self.ifo0, self.vts)
         else:
-            debug_print('We don\'t have dvdsrc and can\'t double check the json output with libdvdread.')
+            sampled = set(cast(_LazyVTSList, self.vts).parsed) | set(
+                random.Random(self.fingerprint).sample(range(1, num_vts + 1), min(num_vts, _VALIDATION_SAMPLES))
+            )
+
+            # only the sampled ifos are compared, the others are taken as they are from dvdsrc
+            dvdsrc_ifos[0] = ifo0_to_json(self.ifo0)
+
+            for title_set_nr in sampled:
+                dvdsrc_ifos[title_set_nr] = ifox_to_json(self.vts[title_set_nr - 1])
+
+            our_json = {'ifos': dvdsrc_ifos}
+
+        mismatch = find_json_mismatch(dvdsrc_json, our_json)
+
+        disc_info_cache.set_validation(self.fingerprint, mismatch)
+
+        if mismatch is not None:
+            warnings.warn(
+                f'libdvdread json does not match python implentation at {mismatch}\n'
+                f'json a,b have been written to {self.output_folder}'
+            )
+
+            for k, v in [('a', dvdsrc_json), ('b', our_json)]:
+                with open(os.path.join(self.output_folder, f'{k}.json'), 'wt') as file:
+                    json.dump(v, file, sort_keys=True)
@@ -1,5 +1,6 @@
 # ruff: noqa: F401, F403
 
 from . import parsedvd
+from .cache import *
 from .IsoFile import *
 from .title import *
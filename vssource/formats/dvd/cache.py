@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import pickle
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import RLock
+
+from vstools import PackageStorage, SPath, SPathLike
+
+from .parsedvd import IFO0, IFOX
+
+__all__ = [
+    'DiscInfoCache',
+
+    'disc_info_cache'
+]
+
+
+# Bump whenever the pickled parsedvd dataclasses change layout
+_DISK_CACHE_VERSION = 2
+
+# What a missing, truncated, stale or otherwise unusable pickle can raise
+_UNPICKLE_ERRORS = (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError)
+_PICKLE_ERRORS = (OSError, pickle.PicklingError, AttributeError, TypeError)
+
+
+@dataclass
+class _DiscEntry:
+    ifo0: IFO0
+    vts: dict[int, IFOX] = field(default_factory=dict)
+
+    # whether the disc was checked against libdvdread and, if so, the first mismatch found
+    validated: bool = False
+    mismatch: str | None = None
+
+
+class DiscInfoCache:
+    """
+    Cache of the parsed IFOs of DVDs, keyed by the fingerprint of the disc.
+
+    Entries hold the VMG IFO, the VTS IFOs parsed so far, by title set number,
+    and the result of the libdvdread cross-check of the disc.
+    The optional disk tier pickles them under a `PackageStorage`, so reopening a disc in a later run
+    doesn't need to fetch, or mount the disc for, and parse its IFOs again.
+    Changes are only kept in memory until `flush`, which `IsoFile` calls once per open,
+    and entries that are still pending are written on eviction and at exit.
+
+    The results of the libdvdread cross-check are also kept, with `validation_disk`, in a small json
+    under the same `PackageStorage`, independently of `disk`, so a disc is only ever checked once.
+    """
+
+    def __init__(
+        self, maxsize: int = 16, disk: bool = False, storage_folder: SPathLike | None = None,
+        validation_disk: bool = True
+    ) -> None:
+        self.maxsize = maxsize
+        self.disk = disk
+        self.storage_folder = storage_folder
+        self.validation_disk = validation_disk
+
+        self._entries = OrderedDict[str, _DiscEntry]()
+        self._pending = set[str]()
+        self._validations: dict[str, str | None] | None = None
+        self._lock = RLock()
+
+        atexit.register(self.flush)
+
+    def get(self, fingerprint: str) -> tuple[IFO0, dict[int, IFOX]] | None:
+        """Return the VMG IFO and the VTS IFOs cached for the disc, if any."""
+
+        if (entry := self._get_entry(fingerprint)) is None:
+            return None
+
+        return entry.ifo0, dict(entry.vts)
+
+    def set(self, fingerprint: str, ifo0: IFO0, vts: dict[int, IFOX]) -> None:
+        """Cache the VMG IFO and the VTS IFOs parsed so far for the disc, keeping its validation result."""
+
+        with self._lock:
+            entry = _DiscEntry(ifo0, dict(vts))
+
+            if (previous := self._get_entry(fingerprint)) is not None:
+                entry.validated, entry.mismatch = previous.validated, previous.mismatch
+
+            self._store(fingerprint, entry)
+            self._pending.add(fingerprint)
+
+    def set_vts(self, fingerprint: str, title_set_nr: int, vts: IFOX) -> None:
+        """Add a VTS IFO parsed later on to an already cached disc."""
+
+        with self._lock:
+            if (entry := self._get_entry(fingerprint)) is None:
+                return
+
+            entry.vts[title_set_nr] = vts
+            self._pending.add(fingerprint)
+
+    def get_validation(self, fingerprint: str) -> tuple[bool, str | None]:
+        """Return whether the disc was validated and the first mismatch that was found, if any."""
+
+        if (entry := self._get_entry(fingerprint)) is not None and entry.validated:
+            return entry.validated, entry.mismatch
+
+        with self._lock:
+            validations = self._get_validations()
+
+            if fingerprint in validations:
+                return True, validations[fingerprint]
+
+        return False, None
+
+    def set_validation(self, fingerprint: str, mismatch: str | None) -> None:
+        """Record the result of validating a disc."""
+
+        with self._lock:
+            if (entry := self._get_entry(fingerprint)) is not None:
+                entry.validated, entry.mismatch = True, mismatch
+                self._pending.add(fingerprint)
+
+            validations = self._get_validations()
+
+            if fingerprint in validations and validations[fingerprint] == mismatch:
+                return
+
+            validations[fingerprint] = mismatch
+
+            self._save_validations()
+
+    def flush(self, fingerprint: str | None = None) -> None:
+        """Write the pending changes of the disc, or of every disc if `fingerprint` is None, to the disk tier."""
+
+        with self._lock:
+            fingerprints = self._pending & {fingerprint} if fingerprint is not None else set(self._pending)
+
+            self._pending -= fingerprints
+
+            entries = [(fp, self._entries[fp]) for fp in fingerprints if fp in self._entries]
+
+        for fp, entry in entries:
+            self._dump(fp, entry)
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop every entry in memory and, if `disk` is True, in the disk tier too."""
+
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._validations = None
+
+        if disk:
+            self._get_validations_path().unlink(missing_ok=True)
+
+            for file in self._get_storage().folder.glob('dvd_info_*.pickle'):
+                try:
+                    file.unlink()
+                except OSError:
+                    pass
+
+    def _get_entry(self, fingerprint: str) -> _DiscEntry | None:
+        with self._lock:
+            if fingerprint in self._entries:
+                self._entries.move_to_end(fingerprint)
+                return self._entries[fingerprint]
+
+        if (entry := self._load(fingerprint)) is not None:
+            self._store(fingerprint, entry)
+
+        return entry
+
+    def _store(self, fingerprint: str, entry: _DiscEntry) -> None:
+        with self._lock:
+            self._entries[fingerprint] = entry
+            self._entries.move_to_end(fingerprint)
+
+            while len(self._entries) > max(self.maxsize, 0):
+                evicted, evicted_entry = self._entries.popitem(False)
+
+                if evicted in self._pending:
+                    self._pending.discard(evicted)
+                    self._dump(evicted, evicted_entry)
+
+    def _get_storage(self) -> PackageStorage:
+        return PackageStorage(self.storage_folder, package_name='vssource')
+
+    def _get_disk_path(self, fingerprint: str) -> SPath:
+        return self._get_storage().get_file(f'dvd_info_{fingerprint}', ext='.pickle')
+
+    def _get_validations_path(self) -> SPath:
+        return self._get_storage().get_file('dvd_validation', ext='.json')
+
+    def _get_validations(self) -> dict[str, str | None]:
+        if self._validations is not None:
+            return self._validations
+
+        self._validations = {}
+
+        if not self.validation_disk:
+            return self._validations
+
+        try:
+            with open(self._get_validations_path(), 'r') as file:
+                stored = dict(json.load(file))
+        except (OSError, ValueError, TypeError):
+            return self._validations
+
+        self._validations.update(
+            (fingerprint, mismatch) for fingerprint, mismatch in stored.items()
+            if mismatch is None or isinstance(mismatch, str)
+        )
+
+        return self._validations
+
+    def _save_validations(self) -> None:
+        if not self.validation_disk:
+            return
+
+        path = self._get_validations_path()
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump(self._validations, file, indent=4)
+
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+
+    def _load(self, fingerprint: str) -> _DiscEntry | None:
+        if not self.disk:
+            return None
+
+        try:
+            with open(self._get_disk_path(fingerprint), 'rb') as file:
+                version, stored_fingerprint, entry = pickle.load(file)
+        except _UNPICKLE_ERRORS:
+            return None
+
+        if (version, stored_fingerprint) != (_DISK_CACHE_VERSION, fingerprint):
+            return None
+
+        return entry
+
+    def _dump(self, fingerprint: str, entry: _DiscEntry) -> None:
+        if not self.disk:
+            return
+
+        path = self._get_disk_path(fingerprint)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+
+        try:
+            with open(tmp_path, 'wb') as file:
+                pickle.dump((_DISK_CACHE_VERSION, fingerprint, entry), file, pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tmp_path, path)
+        except _PICKLE_ERRORS:
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+
+disc_info_cache = DiscInfoCache()
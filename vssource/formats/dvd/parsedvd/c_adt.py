@@ -30,6 +30,15 @@ class CADT:
         self.cell_adr_table = list[CellAdr]()
         cnt = (end + 1 - 6) // 12
 
+        # (vob_id, cell_id) -> sector ranges, in table order
+        self._sector_ranges = dict[tuple[int, int], list[tuple[int, int]]]()
+
         for _ in range(cnt):
             vob_id, cell_id, __, start_sector, last_sector = reader._unpack_byte(2, 1, 1, 4, 4)
             self.cell_adr_table.append(CellAdr(vob_id, cell_id, start_sector, last_sector))
+            self._sector_ranges.setdefault((vob_id, cell_id), []).append((start_sector, last_sector))
+
+    def get_sector_ranges(self, vob_id: int, cell_id: int) -> list[tuple[int, int]]:
+        """Start and last sectors of every address entry of the cell."""
+
+        return list(self._sector_ranges.get((vob_id, cell_id), ()))
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import os
+from array import array
+from bisect import bisect_left
 from dataclasses import asdict, dataclass
-from typing import Any
+from typing import Any, Sequence
 
 from .c_adt import CADT
 from .sector import SectorReadHelper
@@ -14,6 +15,8 @@ __all__ = [
     'IFO0',
     'PTTInfo',
     'IFOX',
+    'ifo0_to_json',
+    'ifox_to_json',
     'to_json'
 ]
 
@@ -33,8 +36,7 @@ class IFO0:
     tt_srpt: list[IFO0Title]
 
     def __init__(self, reader: SectorReadHelper):
-        reader.ifo.seek(0x3E, os.SEEK_SET)
-        self.num_vts, = reader._unpack_byte(2)
+        self.num_vts, = reader._seek_unpack_byte(0x3E, 2)
 
         # tt_srpt
         reader._goto_sector_ptr(0x00C4)
@@ -60,7 +62,7 @@ class PTTInfo:
 class IFOX:
     vtsi_mat: VTSIMat
     vts_c_adt: CADT
-    vts_vobu_admap: list[int]
+    vts_vobu_admap: array[int]
     vts_ptt_srpt: list[list[PTTInfo]]
     vts_pgci: VTSPgci
 
@@ -75,10 +77,25 @@ class IFOX:
         reader._goto_sector_ptr(0x00E4)
         end, = reader._unpack_byte(4)
 
-        self.vts_vobu_admap = []
         cnt = (end + 1 - 4) // 4
-        for _ in range(cnt):
-            self.vts_vobu_admap += [reader._unpack_byte(4)[0]]
+
+        self.vts_vobu_admap = reader._unpack_array('I', cnt)
+
+        admap = self.vts_vobu_admap
+        self._admap_sorted = all(admap[i] <= admap[i + 1] for i in range(len(admap) - 1))
+
+    def get_vobu_index(self, sector: int) -> int:
+        """Index of the first VOBU starting at `sector`, raising a ValueError if there's none, like `list.index`."""
+
+        admap = self.vts_vobu_admap
+
+        if not self._admap_sorted:
+            return admap.index(sector)
+
+        if (idx := bisect_left(admap, sector)) == len(admap) or admap[idx] != sector:
+            raise ValueError(f'{sector} is not in the VOBU address map')
+
+        return idx
 
     def _vts_ptt_srpt(self, reader: SectorReadHelper) -> None:
         reader._goto_sector_ptr(0x00C8)
@@ -86,45 +103,52 @@ class IFOX:
 
         # not really sure with this
         correction = num * 4 + 8
-        offsets = [x - correction for x in reader._unpack_byte(4, repeat=num)]
+        offsets = reader._unpack_array('I', num)
 
         total_ptts = (end - correction + 4 + 1 - 4) // 4
 
-        all_ptts_x = list(reader._unpack_byte(2, 2, repeat=total_ptts))
-        all_ptts = [
-            (all_ptts_x[i * 2 + 0], all_ptts_x[i * 2 + 1])
-            for i in range(len(all_ptts_x) // 2)
-        ]
+        # pairs of pgcn, pgn
+        all_ptts = reader._unpack_array('H', total_ptts * 2)
 
-        offsets = [a // 4 for a in offsets] + [len(all_ptts)]
+        bounds = [(x - correction) // 4 * 2 for x in offsets] + [len(all_ptts)]
 
-        titles = [
-            [PTTInfo(p[1], p[0]) for p in all_ptts[offsets[a]:offsets[a + 1]]]
-            for a in range(num)
+        self.vts_ptt_srpt = [
+            list(map(PTTInfo, all_ptts[start + 1:stop:2], all_ptts[start:stop:2]))
+            for start, stop in zip(bounds, bounds[1:])
         ]
 
-        self.vts_ptt_srpt = titles
 
+def ifo0_to_json(ifo0: IFO0) -> dict[str, list[dict[str, Any]]]:
+    """The VMG IFO in the layout of the ifos of the libdvdread json of dvdsrc."""
 
-def to_json(ifo0: IFO0, vts: list[IFOX]) -> dict[str, list[dict[str, Any]]]:
-    crnt = dict[str, list[dict[str, Any]]]()
-
-    # ifo0
     i0 = dict[str, list[dict[str, Any]]]()
     i0['tt_srpt'] = [asdict(a) for a in ifo0.tt_srpt]
     i0['pgci_ut'] = []
     i0['vts_c_adt'] = []
     i0['vts_pgcit'] = []
     i0['vts_ptt_srpt'] = []
-    jj = [asdict(a) for a in vts]
-    for ad in jj:
-        cadt = ad['vts_c_adt']
-        ad['vts_c_adt'] = cadt['cell_adr_table']
-        ad['vts_pgcit'] = ad['vts_pgci']['pgcs']
-        del ad['vts_pgci']
-        ad['pgci_ut'] = []
-        ad['tt_srpt'] = []
-
-    crnt['ifos'] = [i0, *jj]
+
+    return i0
+
+
+def ifox_to_json(vts: IFOX) -> dict[str, Any]:
+    """A VTS IFO in the layout of the ifos of the libdvdread json of dvdsrc."""
+
+    ad = asdict(vts)
+    ad['vts_vobu_admap'] = ad['vts_vobu_admap'].tolist()
+    cadt = ad['vts_c_adt']
+    ad['vts_c_adt'] = cadt['cell_adr_table']
+    ad['vts_pgcit'] = ad['vts_pgci']['pgcs']
+    del ad['vts_pgci']
+    ad['pgci_ut'] = []
+    ad['tt_srpt'] = []
+
+    return ad
+
+
+def to_json(ifo0: IFO0, vts: Sequence[IFOX]) -> dict[str, list[dict[str, Any]]]:
+    crnt = dict[str, list[dict[str, Any]]]()
+
+    crnt['ifos'] = [ifo0_to_json(ifo0), *map(ifox_to_json, vts)]
 
     return crnt
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-import os
-from io import BufferedReader, BytesIO
+import mmap
+import sys
+from array import array
+from functools import lru_cache
+from io import BufferedReader
 from pprint import pformat
-from struct import unpack
+from struct import Struct
 
 from vstools import SPath, SPathLike
 
@@ -12,47 +15,113 @@ __all__ = [
 ]
 
 
+_byte_size_lut = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+@lru_cache(256)
+def _get_struct(n: tuple[int, ...], repeat: int) -> Struct:
+    return Struct('>' + ''.join(_byte_size_lut.get(a, 'B') for a in n) * repeat)
+
+
 class SectorReadHelper:
-    _byte_size_lut = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+    """
+    Big endian field reader over the bytes of an IFO.
+
+    Files are memory mapped and fields are decoded in place with precompiled structs,
+    so nothing is copied out of the IFO until it's unpacked.
+    """
+
     file: SPath | None = None
 
     def __init__(self, ifo: bytes | SPathLike | BufferedReader) -> None:
-        if isinstance(ifo, bytes):
-            ifo = BufferedReader(BytesIO(ifo))  # type: ignore
+        self._mmap: mmap.mmap | None = None
 
-        if not isinstance(ifo, BufferedReader):
+        if isinstance(ifo, BufferedReader):
+            ifo = ifo.read()
+        elif not isinstance(ifo, (bytes, bytearray, memoryview)):
             self.file = SPath(ifo)
-            ifo = self.file.open('rb')
 
-        self.ifo = ifo
+            with self.file.open('rb') as file:
+                try:
+                    self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # empty files can't be mapped
+                    ifo = file.read()
+
+        self.data = memoryview(self._mmap if self._mmap is not None else ifo)
+        self.pos = 0
+
+    def close(self) -> None:
+        self.data.release()
+
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
 
     def __del__(self) -> None:
-        if self.file is not None and self.ifo and not self.ifo.closed:
-            self.ifo.close()
+        if getattr(self, '_mmap', None) is not None:
+            self.close()
+
+    def _seek(self, pos: int) -> None:
+        self.pos = pos
+
+    def _tell(self) -> int:
+        return self.pos
+
+    def _skip(self, n: int) -> None:
+        self.pos += n
+
+    def _read(self, n: int) -> bytes:
+        if self.pos + n > len(self.data):
+            raise EOFError(f'Tried to read {n} bytes at {self.pos} past the end of the IFO!')
+
+        buf = self.data[self.pos:self.pos + n].tobytes()
+
+        self.pos += n
+
+        return buf
 
     def _goto_sector_ptr(self, pos: int) -> None:
-        self.ifo.seek(pos, os.SEEK_SET)
+        self.pos = pos
 
         ptr, = self._unpack_byte(4)
 
-        self.ifo.seek(ptr * 2048, os.SEEK_SET)
+        self.pos = ptr * 2048
 
     def _seek_unpack_byte(self, addr: int, *n: int) -> tuple[int, ...]:
-        self.ifo.seek(addr, os.SEEK_SET)
+        self.pos = addr
         return self._unpack_byte(*n)
 
     def _unpack_byte(self, *n: int, repeat: int = 1) -> tuple[int, ...]:
-        n_list = list(n) * repeat
+        struct = _get_struct(n, repeat)
+
+        if self.pos + struct.size > len(self.data):
+            raise EOFError(f'Tried to read {struct.size} bytes at {self.pos} past the end of the IFO!')
+
+        values = struct.unpack_from(self.data, self.pos)
+
+        self.pos += struct.size
+
+        return values
+
+    def _unpack_array(self, typecode: str, count: int) -> array[int]:
+        """Bulk decode `count` consecutive big endian integers of the array `typecode`."""
+
+        values = array(typecode)
+
+        size = values.itemsize * count
 
-        bytecnt = sum(n_list)
+        if self.pos + size > len(self.data):
+            raise EOFError(f'Tried to read {size} bytes at {self.pos} past the end of the IFO!')
 
-        stra = ">" + ''.join(self._byte_size_lut.get(a, 'B') for a in n_list)
+        values.frombytes(self.data[self.pos:self.pos + size])
 
-        buf = self.ifo.read(bytecnt)
+        if sys.byteorder == 'little':
+            values.byteswap()
 
-        assert len(buf) == bytecnt
+        self.pos += size
 
-        return unpack(stra, buf)
+        return values
 
     def __repr__(self) -> str:
-        return pformat(vars(self), sort_dicts=False)
+        return pformat({'file': self.file, 'size': len(self.data), 'pos': self.pos}, sort_dicts=False)
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import os
 from dataclasses import dataclass
 
 from .sector import SectorReadHelper
@@ -69,7 +68,7 @@ class VTSPgci:
     def __init__(self, reader: SectorReadHelper):
         reader._goto_sector_ptr(0x00CC)
 
-        posn = reader.ifo.tell()
+        posn = reader._tell()
 
         nr_pgcs, *_ = reader._unpack_byte(2, 2, 4)
 
@@ -77,16 +76,16 @@ class VTSPgci:
 
         for _ in range(nr_pgcs):
             _, offset = reader._unpack_byte(4, 4)
-            bk = reader.ifo.tell()
+            bk = reader._tell()
 
             audio_control = list[AudioControl]()
 
             pgc_base = posn + offset
 
-            reader.ifo.seek(pgc_base, os.SEEK_SET)
+            reader._seek(pgc_base)
 
             _, num_programs, num_cells = reader._unpack_byte(2, 1, 1)
-            reader._unpack_byte(4, 4)
+            reader._skip(8)
 
             for _ in range(8):
                 ac, _ = reader._unpack_byte(1, 1)
@@ -96,26 +95,26 @@ class VTSPgci:
 
                 audio_control.append(AudioControl(available=available, number=number))
 
-            reader._unpack_byte(4, repeat=32)
+            reader._skip(4 * 32)
 
             next_pgcn, prev_pgcn, group_pgcn = reader._unpack_byte(2, 2, 2)
 
-            reader._unpack_byte(1, 1)
+            reader._skip(2)
 
-            reader._unpack_byte(4, repeat=16)
+            reader._skip(4 * 16)
 
             _, offset_program, offset_playback, offset_position = reader._unpack_byte(2, 2, 2, 2)
 
-            reader.ifo.seek(pgc_base + offset_program, os.SEEK_SET)
+            reader._seek(pgc_base + offset_program)
 
             program_map = list(reader._unpack_byte(1, repeat=num_programs))
 
-            reader.ifo.seek(pgc_base + offset_position, os.SEEK_SET)
+            reader._seek(pgc_base + offset_position)
 
             cell_position_bytes = [reader._unpack_byte(2, 1, 1) for _ in range(num_cells)]
             cell_position = [CellPosition(cell_nr=a[2], vob_id_nr=a[0]) for a in cell_position_bytes]
 
-            reader.ifo.seek(pgc_base + offset_playback, os.SEEK_SET)
+            reader._seek(pgc_base + offset_playback)
 
             cell_playback_bytes = [
                 reader._unpack_byte(1, 1, 1, 1, 1, 1, 1, 1, 4, 4, 4, 4)
@@ -137,7 +136,7 @@ class VTSPgci:
                 ) for a in cell_playback_bytes
             ]
 
-            reader.ifo.seek(bk, os.SEEK_SET)
+            reader._seek(bk)
 
             self.pgcs.append(
                 PGC(
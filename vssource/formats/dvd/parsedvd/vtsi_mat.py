@@ -51,7 +51,7 @@ class VTSIMat:
         num_audio, = reader._seek_unpack_byte(0x0202, 2)
 
         for _ in range(num_audio):
-            buf = reader.ifo.read(8)
+            buf = reader._read(8)
 
             lang_type = (buf[0] & 0b1100) >> 2
             audio_format = (buf[0] & 0b11100000) >> 5
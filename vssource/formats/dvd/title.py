@@ -8,7 +8,7 @@ from typing import TYPE_CHECKING, Callable, Iterator, Sequence, SupportsIndex, o
 from vstools import CustomValueError, FuncExceptT, T, get_prop, set_output, to_arr, vs, vs_object
 
 from ...utils import debug_print
-from .utils import AC3_FRAME_LENGTH, PCR_CLOCK, absolute_time_from_timecode
+from .utils import AC3_FRAME_LENGTH, PCR_CLOCK, DvdnavChapterCheck, absolute_time_from_timecode
 
 if TYPE_CHECKING:
     from .IsoFileCore import IsoFileCore
@@ -163,10 +163,20 @@ class Title:
     _duration_times: list[float]
     _audios: list[str]
     _patched_end_chapter: int | None
+    _dvdnav_check: Callable[[], DvdnavChapterCheck] | None = None
 
     def __post_init__(self) -> None:
         self.audios = TitleAudios(self)
 
+    @property
+    def dvdnav_check(self) -> DvdnavChapterCheck | None:
+        """Result of the check of the chapters against dvdnav, waiting for it if needed. None if it wasn't run."""
+
+        if self._dvdnav_check is None:
+            return None
+
+        return self._dvdnav_check()
+
     @property
     def audio(self) -> vs.AudioNode:
         if not self.audios:
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
 import subprocess
-from typing import Sequence, SupportsFloat
+import warnings
+from dataclasses import dataclass
+from fractions import Fraction
+from threading import Lock
+from typing import Any, Sequence, SupportsFloat
 
 from vstools import SupportsString
 
 __all__ = [
+    'DvdnavChapterCheck',
+
     'double_check_dvdnav',
+    'check_dvdnav_chapters',
     'absolute_time_from_timecode',
+    'find_json_mismatch',
 
     'AC3_FRAME_LENGTH', 'PCR_CLOCK'
 ]
@@ -20,16 +28,82 @@ PCR_CLOCK = 90_000
 # d2vwitch needs this patch applied
 # https://gist.github.com/jsaowji/ead18b4f1b90381d558eddaf0336164b
 
+@dataclass
+class DvdnavChapterCheck:
+    """Result of checking the chapters of a title against the ones dvdnav reports."""
+
+    title: int
+    chapters: list[float]
+    dvdnav_chapters: list[float] | None
+    mismatch: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.dvdnav_chapters is not None and self.mismatch is None
+
+
+_dvdnav_cache = dict[tuple[str, int], list[float] | None]()
+_dvdnav_lock = Lock()
+
+
 # https://gist.github.com/jsaowji/2bbf9c776a3226d1272e93bb245f7538
-def double_check_dvdnav(iso: SupportsString, title: int) -> list[float] | None:
+def double_check_dvdnav(iso: SupportsString, title: int, fingerprint: str | None = None) -> list[float] | None:
+    if fingerprint is not None:
+        with _dvdnav_lock:
+            if (fingerprint, title) in _dvdnav_cache:
+                return _dvdnav_cache[(fingerprint, title)]
+
+    chapters = None
+
     try:
         ap = subprocess.check_output(['dvdsrc_dvdnav_title_ptt_test', str(iso), str(title)])
 
-        return list(map(float, ap.splitlines()))
+        chapters = list(map(float, ap.splitlines()))
     except FileNotFoundError:
         ...
 
-    return None
+    if fingerprint is not None:
+        with _dvdnav_lock:
+            _dvdnav_cache[(fingerprint, title)] = chapters
+
+    return chapters
+
+
+def check_dvdnav_chapters(
+    iso: SupportsString, title: int, chapters: list[float], fps: Fraction, fingerprint: str | None = None
+) -> DvdnavChapterCheck:
+    """Compare chapter times, in seconds, of a title with the ones from dvdnav, warning on mismatches."""
+
+    dvdnav_chapters = double_check_dvdnav(iso, title, fingerprint)
+
+    result = DvdnavChapterCheck(title, chapters, dvdnav_chapters)
+
+    if dvdnav_chapters is None:
+        return result
+
+    # ???????
+    if fps.denominator == 1001:
+        dvdnav_chapters = result.dvdnav_chapters = [a * 1.001 for a in dvdnav_chapters]
+
+    if len(chapters) != len(dvdnav_chapters):
+        result.mismatch = f'dvdnavchapters length do not match our chapters {len(chapters)} {len(dvdnav_chapters)}'
+    else:
+        framelen = fps.denominator / fps.numerator
+        for i in range(len(chapters)):
+            # tolerance no idea why so big
+            # on hard telecine ntcs it matches up almost perfectly
+            # but on ~24p pal rffd it does not lol
+            if abs(chapters[i] - dvdnav_chapters[i]) > framelen * 20:
+                result.mismatch = (
+                    f'dvdnavchapters do not match our chapters {len(chapters)} {len(dvdnav_chapters)}'
+                    f' index: {i} {chapters[i]}'
+                )
+                break
+
+    if result.mismatch is not None:
+        warnings.warn(f'Title {title}: {result.mismatch} (open an issue in github)')
+
+    return result
 
 
 def absolute_time_from_timecode(timecodes: Sequence[SupportsFloat]) -> list[float]:
@@ -39,3 +113,33 @@ def absolute_time_from_timecode(timecodes: Sequence[SupportsFloat]) -> list[floa
         absolutetime.append(absolutetime[i] + float(a))
 
     return absolutetime
+
+
+def find_json_mismatch(a: Any, b: Any, path: str = '') -> str | None:
+    """Walk two json-like structures and return the path of the first difference, or None if they're equal."""
+
+    if isinstance(a, dict) and isinstance(b, dict):
+        if a.keys() != b.keys():
+            key = sorted(a.keys() ^ b.keys(), key=str)[0]
+            return f'{path}.{key} (only in {"a" if key in a else "b"})'
+
+        for key in sorted(a, key=str):
+            if (mismatch := find_json_mismatch(a[key], b[key], f'{path}.{key}')) is not None:
+                return mismatch
+
+        return None
+
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        for i, (va, vb) in enumerate(zip(a, b)):
+            if (mismatch := find_json_mismatch(va, vb, f'{path}[{i}]')) is not None:
+                return mismatch
+
+        if len(a) != len(b):
+            return f'{path} (length {len(a)} != {len(b)})'
+
+        return None
+
+    if type(a) is not type(b) or a != b:
+        return f'{path} ({a!r} != {b!r})'
+
+    return None
@@ -0,0 +1,548 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from struct import error as StructError, unpack_from
+from threading import Lock
+from typing import BinaryIO, Iterator
+
+from vstools import SPath, SPathLike
+
+from ..indexers import Indexer
+
+__all__ = [
+    'VideoProbe',
+
+    'probe_video'
+]
+
+
+# Container headers and the first packets of video are always in here
+_PROBE_SIZE = 512 << 10
+
+# Codec configuration boxes/elements that are bigger than this aren't read
+_MAX_CONFIG_SIZE = 1 << 20
+
+_MAX_CACHED_PROBES = 1024
+
+_NAL_START_CODE = re.compile(b'\x00\x00\x01')
+_EMULATION_PREVENTION = re.compile(b'\x00\x00\x03')
+
+_AVC_HIGH_PROFILES = {100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135}
+
+# codec names follow the (lowercased) video formats of MediaInfo
+_TS_STREAM_TYPES = {
+    0x01: 'mpeg video', 0x02: 'mpeg video', 0x10: 'mpeg-4 visual',
+    0x1B: 'avc', 0x24: 'hevc', 0x33: 'vvc', 0xEA: 'vc-1'
+}
+
+_MKV_CODEC_IDS = {
+    'V_MPEG4/ISO/AVC': 'avc', 'V_MPEGH/ISO/HEVC': 'hevc', 'V_MPEGI/ISO/VVC': 'vvc',
+    'V_AV1': 'av1', 'V_VP8': 'vp8', 'V_VP9': 'vp9',
+    'V_MPEG1': 'mpeg video', 'V_MPEG2': 'mpeg video',
+    'V_MPEG4/ISO/SP': 'mpeg-4 visual', 'V_MPEG4/ISO/ASP': 'mpeg-4 visual', 'V_MPEG4/ISO/AP': 'mpeg-4 visual',
+    'V_MS/VFW/FOURCC': 'vfw', 'V_FFV1': 'ffv1', 'V_PRORES': 'prores', 'V_THEORA': 'theora'
+}
+
+_MKV_CONFIG_KINDS = {'avc': b'avcC', 'hevc': b'hvcC', 'av1': b'av1C'}
+
+_FOURCCS = {
+    'avc1': 'avc', 'avc3': 'avc', 'h264': 'avc', 'x264': 'avc',
+    'hvc1': 'hevc', 'hev1': 'hevc', 'hevc': 'hevc', 'vvc1': 'vvc', 'vvi1': 'vvc',
+    'av01': 'av1', 'vp08': 'vp8', 'vp09': 'vp9',
+    'mp4v': 'mpeg-4 visual', 'xvid': 'mpeg-4 visual', 'divx': 'mpeg-4 visual', 'dx50': 'mpeg-4 visual',
+    'mp2v': 'mpeg video', 'mpg2': 'mpeg video', 'ffv1': 'ffv1', 'wvc1': 'vc-1',
+    'apch': 'prores', 'apcn': 'prores', 'apcs': 'prores', 'apco': 'prores', 'ap4h': 'prores', 'ap4x': 'prores'
+}
+
+_ANNEXB_SUFFIXES = {
+    '.264': 'avc', '.h264': 'avc', '.avc': 'avc', '.jsv': 'avc',
+    '.265': 'hevc', '.h265': 'hevc', '.hevc': 'hevc',
+    '.m1v': 'mpeg video', '.m2v': 'mpeg video', '.mpv': 'mpeg video'
+}
+
+_EBML_HEADER, _MKV_SEGMENT, _MKV_SEEKHEAD, _MKV_SEEK, _MKV_SEEK_ID, _MKV_SEEK_POSITION = (
+    0x1A45DFA3, 0x18538067, 0x114D9B74, 0x4DBB, 0x53AB, 0x53AC
+)
+_MKV_TRACKS, _MKV_TRACK_ENTRY, _MKV_TRACK_TYPE, _MKV_CODEC_ID, _MKV_CODEC_PRIVATE = (
+    0x1654AE6B, 0xAE, 0x83, 0x86, 0x63A2
+)
+_MKV_VIDEO, _MKV_COLOUR, _MKV_BITS_PER_CHANNEL, _MKV_CLUSTER = 0xE0, 0x55B0, 0x55B2, 0x1F43B675
+
+
+@dataclass
+class VideoProbe:
+    """Container, codec and bit depth of the first video stream of a file, None where unknown."""
+
+    container: str | None = None
+    codec: str | None = None
+    bit_depth: int | None = None
+
+
+_probe_cache = OrderedDict[bytes, VideoProbe]()
+_probe_cache_lock = Lock()
+
+
+def probe_video(filepath: SPathLike) -> VideoProbe:
+    """
+    Find out the codec and bit depth of the video of a file.
+
+    Only the headers of MKV, MP4/MOV, MPEG-TS/M2TS and MPEG-PS files (and raw AVC/HEVC/MPEG-2 streams)
+    are read, usually just the first few hundred KB. Results are memoized per content fingerprint.
+    """
+
+    filepath = SPath(filepath)
+
+    fingerprint = Indexer.get_file_fingerprint(filepath)
+
+    with _probe_cache_lock:
+        if fingerprint in _probe_cache:
+            _probe_cache.move_to_end(fingerprint)
+            return _probe_cache[fingerprint]
+
+    with open(filepath, 'rb') as file:
+        head = file.read(_PROBE_SIZE)
+
+        try:
+            probe = _probe_head(file, head, filepath.suffix.lower())
+        except (ValueError, IndexError, EOFError, StructError):
+            # truncated or corrupted headers
+            probe = VideoProbe()
+
+    with _probe_cache_lock:
+        _probe_cache[fingerprint] = probe
+
+        while len(_probe_cache) > _MAX_CACHED_PROBES:
+            _probe_cache.popitem(False)
+
+    return probe
+
+
+def _probe_head(file: BinaryIO, head: bytes, suffix: str) -> VideoProbe:
+    if head[:4] == _EBML_HEADER.to_bytes(4, 'big'):
+        return _probe_mkv(file, head)
+
+    if head[4:8] in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip', b'pnot'):
+        return _probe_mp4(file)
+
+    for packet_size, offset, container in ((188, 0, 'mpeg-ts'), (192, 4, 'bdav'), (204, 0, 'mpeg-ts')):
+        if head[offset:offset + 1] == head[offset + packet_size:offset + packet_size + 1] == b'\x47':
+            return _probe_ts(head, packet_size, offset, container)
+
+    if head[:4] == b'\x00\x00\x01\xba':
+        return _probe_ps(head)
+
+    if codec := _ANNEXB_SUFFIXES.get(suffix):
+        # raw elementary streams have no container, go by the extension like for the unknown ones
+        return VideoProbe(suffix, codec, _find_es_bit_depth(codec, head))
+
+    return VideoProbe()
+
+
+class _BitReader:
+    def __init__(self, data: bytes) -> None:
+        self.value = int.from_bytes(data, 'big')
+        self.length = len(data) * 8
+        self.pos = 0
+
+    def read(self, n: int) -> int:
+        if (pos := self.pos + n) > self.length:
+            raise EOFError
+
+        self.pos = pos
+
+        return (self.value >> (self.length - pos)) & ((1 << n) - 1)
+
+    def read_ue(self) -> int:
+        zeros = 0
+
+        while not self.read(1):
+            if (zeros := zeros + 1) > 31:
+                raise ValueError('Invalid exp-Golomb code!')
+
+        return (1 << zeros) - 1 + self.read(zeros)
+
+
+def _get_avc_sps_bit_depth(sps: bytes) -> int:
+    # sps is the rbsp after the nal unit header
+    reader = _BitReader(_EMULATION_PREVENTION.sub(b'\x00\x00', sps[:64]))
+
+    profile_idc = reader.read(8)
+    reader.read(16)
+    reader.read_ue()
+
+    if profile_idc not in _AVC_HIGH_PROFILES:
+        return 8
+
+    if reader.read_ue() == 3:
+        reader.read(1)
+
+    return reader.read_ue() + 8
+
+
+def _get_hevc_sps_bit_depth(sps: bytes) -> int:
+    # sps is the rbsp after the nal unit header
+    reader = _BitReader(_EMULATION_PREVENTION.sub(b'\x00\x00', sps[:160]))
+
+    reader.read(4)
+    max_sub_layers_minus1 = reader.read(3)
+    reader.read(1)
+
+    # general profile_tier_level
+    reader.read(96)
+
+    sub_layers = [(reader.read(1), reader.read(1)) for _ in range(max_sub_layers_minus1)]
+
+    if max_sub_layers_minus1:
+        reader.read(2 * (8 - max_sub_layers_minus1))
+
+    for profile_present, level_present in sub_layers:
+        reader.read(88 * profile_present + 8 * level_present)
+
+    reader.read_ue()
+
+    if reader.read_ue() == 3:
+        reader.read(1)
+
+    reader.read_ue()
+    reader.read_ue()
+
+    if reader.read(1):
+        for _ in range(4):
+            reader.read_ue()
+
+    return reader.read_ue() + 8
+
+
+def _find_es_bit_depth(codec: str, data: bytes) -> int | None:
+    if codec in ('mpeg video', 'vc-1'):
+        return 8 if codec == 'mpeg video' else None
+
+    for match in _NAL_START_CODE.finditer(data):
+        if (start := match.end()) + 2 > len(data):
+            break
+
+        # forbidden_zero_bit, also skips mpeg start codes of packs and pes
+        if data[start] & 0x80:
+            continue
+
+        if codec == 'avc' and data[start] & 0x1F == 7:
+            return _get_avc_sps_bit_depth(data[start + 1:])
+
+        if codec == 'hevc' and (data[start] >> 1) & 0x3F == 33:
+            return _get_hevc_sps_bit_depth(data[start + 2:])
+
+    return None
+
+
+def _get_config_bit_depth(kind: bytes, config: bytes) -> int | None:
+    if kind == b'avcC' and len(config) > 8 and config[5] & 0x1F:
+        sps_length, = unpack_from('>H', config, 6)
+        return _get_avc_sps_bit_depth(config[9:8 + sps_length])
+
+    if kind == b'hvcC' and len(config) >= 23:
+        return (config[17] & 0x07) + 8
+
+    if kind == b'av1C' and len(config) >= 4:
+        return 12 if config[2] & 0x20 else 10 if config[2] & 0x40 else 8
+
+    if kind == b'vpcC' and len(config) >= 7:
+        return config[6] >> 4
+
+    return None
+
+
+def _iter_mp4_boxes(file: BinaryIO, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+    pos = start
+
+    while pos + 8 <= end:
+        file.seek(pos, os.SEEK_SET)
+
+        if len(header := file.read(16)) < 8:
+            return
+
+        size, kind = unpack_from('>I4s', header)
+        header_size = 8
+
+        if size == 1 and len(header) == 16:
+            size, = unpack_from('>Q', header, 8)
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+
+        if size < header_size:
+            return
+
+        yield kind, pos + header_size, min(pos + size, end)
+
+        pos += size
+
+
+def _probe_mp4(file: BinaryIO) -> VideoProbe:
+    end = os.fstat(file.fileno()).st_size
+
+    def _find_box(kind: bytes, start: int, end: int) -> tuple[int, int] | None:
+        return next(((s, e) for k, s, e in _iter_mp4_boxes(file, start, end) if k == kind), None)
+
+    if not (moov := _find_box(b'moov', 0, end)):
+        return VideoProbe('mpeg-4')
+
+    for kind, trak_start, trak_end in _iter_mp4_boxes(file, *moov):
+        if kind != b'trak' or not (mdia := _find_box(b'mdia', trak_start, trak_end)):
+            continue
+
+        if not (hdlr := _find_box(b'hdlr', *mdia)):
+            continue
+
+        file.seek(hdlr[0] + 8, os.SEEK_SET)
+
+        if file.read(4) != b'vide':
+            continue
+
+        stsd = None
+
+        if (minf := _find_box(b'minf', *mdia)) and (stbl := _find_box(b'stbl', *minf)):
+            stsd = _find_box(b'stsd', *stbl)
+
+        if not stsd:
+            continue
+
+        file.seek(stsd[0], os.SEEK_SET)
+        entries = file.read(min(stsd[1] - stsd[0], _MAX_CONFIG_SIZE))
+
+        # version, flags and entry count, then the first VisualSampleEntry
+        entry_size, fourcc = unpack_from('>I4s', entries, 8)
+
+        codec = fourcc.decode('latin-1').strip().lower()
+        codec = _FOURCCS.get(codec, codec)
+
+        bit_depth, pos, entry_end = None, 8 + 86, min(8 + entry_size, len(entries))
+
+        while pos + 8 <= entry_end:
+            size, kind = unpack_from('>I4s', entries, pos)
+
+            if size < 8:
+                break
+
+            if (bit_depth := _get_config_bit_depth(kind, entries[pos + 8:pos + size])) is not None:
+                break
+
+            pos += size
+
+        if bit_depth is None and codec in ('mpeg video', 'mpeg-4 visual', 'vp8'):
+            bit_depth = 8
+
+        return VideoProbe('mpeg-4', codec, bit_depth)
+
+    return VideoProbe('mpeg-4')
+
+
+def _read_ebml_vint(data: bytes, pos: int, keep_marker: bool) -> tuple[int, int]:
+    if not (first := data[pos]):
+        raise ValueError('Invalid EBML variable size integer!')
+
+    length = 9 - first.bit_length()
+
+    value = int.from_bytes(data[pos:pos + length], 'big')
+
+    if not keep_marker:
+        value &= (1 << (7 * length)) - 1
+
+    return value, length
+
+
+def _iter_ebml(data: bytes, start: int, end: int) -> Iterator[tuple[int, int, int]]:
+    pos = start
+
+    while pos < end:
+        element_id, id_length = _read_ebml_vint(data, pos, True)
+        size, size_length = _read_ebml_vint(data, pos + id_length, False)
+
+        pos += id_length + size_length
+
+        # unknown sized elements extend to the end of their parent
+        element_end = end if size == (1 << (7 * size_length)) - 1 else pos + size
+
+        yield element_id, pos, min(element_end, end)
+
+        pos = element_end
+
+
+def _probe_mkv(file: BinaryIO, head: bytes) -> VideoProbe:
+    tracks = seek_tracks = None
+
+    for element_id, start, end in _iter_ebml(head, 0, len(head)):
+        if element_id != _MKV_SEGMENT:
+            continue
+
+        for child_id, child_start, child_end in _iter_ebml(head, start, end):
+            if child_id == _MKV_TRACKS:
+                tracks = head[child_start:child_end]
+            elif child_id == _MKV_SEEKHEAD:
+                for seek_id, seek_start, seek_end in _iter_ebml(head, child_start, child_end):
+                    if seek_id != _MKV_SEEK:
+                        continue
+
+                    seek = {i: head[s:e] for i, s, e in _iter_ebml(head, seek_start, seek_end)}
+
+                    if seek.get(_MKV_SEEK_ID) == _MKV_TRACKS.to_bytes(4, 'big'):
+                        seek_tracks = start + int.from_bytes(seek.get(_MKV_SEEK_POSITION, b''), 'big')
+
+            if tracks is not None or child_id == _MKV_CLUSTER:
+                break
+
+        break
+
+    # the tracks can also be at the end of the file, after the clusters
+    if tracks is None and seek_tracks is not None:
+        file.seek(seek_tracks, os.SEEK_SET)
+
+        header = file.read(12)
+
+        if int.from_bytes(header[:4], 'big') == _MKV_TRACKS:
+            size, size_length = _read_ebml_vint(header, 4, False)
+
+            if size <= _MAX_CONFIG_SIZE:
+                file.seek(seek_tracks + 4 + size_length, os.SEEK_SET)
+                tracks = file.read(size)
+
+    if tracks is None:
+        return VideoProbe('matroska')
+
+    for entry_id, entry_start, entry_end in _iter_ebml(tracks, 0, len(tracks)):
+        if entry_id != _MKV_TRACK_ENTRY:
+            continue
+
+        entry = {i: tracks[s:e] for i, s, e in _iter_ebml(tracks, entry_start, entry_end)}
+
+        if int.from_bytes(entry.get(_MKV_TRACK_TYPE, b''), 'big') != 1:
+            continue
+
+        codec_id = entry.get(_MKV_CODEC_ID, b'').rstrip(b'\x00').decode('latin-1')
+        codec_private = entry.get(_MKV_CODEC_PRIVATE, b'')
+
+        codec = _MKV_CODEC_IDS.get(codec_id, codec_id.lower())
+
+        if codec == 'vfw' and len(codec_private) >= 20:
+            # BITMAPINFOHEADER, biCompression
+            codec = codec_private[16:20].decode('latin-1').strip().lower()
+            codec = _FOURCCS.get(codec, codec)
+
+        bit_depth = None
+
+        # CodecPrivate holds the same configuration record as the mp4 box
+        if config_kind := _MKV_CONFIG_KINDS.get(codec):
+            bit_depth = _get_config_bit_depth(config_kind, codec_private)
+
+        if bit_depth is None and (video := entry.get(_MKV_VIDEO)):
+            for video_id, video_start, video_end in _iter_ebml(video, 0, len(video)):
+                if video_id != _MKV_COLOUR:
+                    continue
+
+                for colour_id, colour_start, colour_end in _iter_ebml(video, video_start, video_end):
+                    if colour_id == _MKV_BITS_PER_CHANNEL:
+                        bit_depth = int.from_bytes(video[colour_start:colour_end], 'big') or None
+
+        if bit_depth is None and codec in ('mpeg video', 'mpeg-4 visual', 'vp8'):
+            bit_depth = 8
+
+        return VideoProbe('matroska', codec, bit_depth)
+
+    return VideoProbe('matroska')
+
+
+def _get_psi_section(payload: bytes) -> bytes:
+    section = payload[1 + payload[0]:]
+
+    section_length = ((section[1] & 0x0F) << 8) | section[2]
+
+    # without the crc
+    return section[:3 + section_length - 4]
+
+
+def _probe_ts(head: bytes, packet_size: int, offset: int, container: str) -> VideoProbe:
+    pmt_pids = set[int]()
+    video_pid, codec = None, None
+    video_es = bytearray()
+
+    for pos in range(offset, len(head) - 188 + 1, packet_size):
+        packet = head[pos:pos + 188]
+
+        if packet[0] != 0x47:
+            continue
+
+        unit_start = packet[1] & 0x40
+        pid = ((packet[1] & 0x1F) << 8) | packet[2]
+        adaptation = (packet[3] >> 4) & 0x03
+
+        start = 4
+
+        if adaptation & 0x02:
+            start += 1 + packet[4]
+
+        if not adaptation & 0x01 or start >= 188:
+            continue
+
+        payload = packet[start:]
+
+        if pid == 0 and unit_start and not pmt_pids:
+            section = _get_psi_section(payload)
+
+            for i in range(8, len(section) - 3, 4):
+                program_number, program_pid = unpack_from('>HH', section, i)
+
+                if program_number:
+                    pmt_pids.add(program_pid & 0x1FFF)
+        elif pid in pmt_pids and unit_start and video_pid is None:
+            section = _get_psi_section(payload)
+
+            i = 12 + (((section[10] & 0x0F) << 8) | section[11])
+
+            while i + 5 <= len(section):
+                stream_type, es_pid, es_info_length = unpack_from('>BHH', section, i)
+
+                if stream_type in _TS_STREAM_TYPES:
+                    video_pid, codec = es_pid & 0x1FFF, _TS_STREAM_TYPES[stream_type]
+                    break
+
+                i += 5 + (es_info_length & 0x0FFF)
+        elif pid == video_pid:
+            if unit_start and payload[:3] == b'\x00\x00\x01':
+                payload = payload[9 + payload[8]:]
+
+            video_es += payload
+
+    if codec is None:
+        return VideoProbe(container)
+
+    return VideoProbe(container, codec, _find_es_bit_depth(codec, bytes(video_es)))
+
+
+def _probe_ps(head: bytes) -> VideoProbe:
+    codec = None
+
+    # program stream map, only there if the stream isn't plain mpeg video
+    if (psm := head.find(b'\x00\x00\x01\xbc')) != -1 and psm + 12 <= len(head):
+        info_length, = unpack_from('>H', head, psm + 8)
+        i = psm + 10 + info_length
+        map_end = i + 2 + unpack_from('>H', head, i)[0]
+        i += 2
+
+        while i + 4 <= min(map_end, len(head)):
+            stream_type, stream_id, es_info_length = unpack_from('>BBH', head, i)
+
+            if 0xE0 <= stream_id <= 0xEF and stream_type in _TS_STREAM_TYPES:
+                codec = _TS_STREAM_TYPES[stream_type]
+                break
+
+            i += 4 + es_info_length
+
+    if codec is None and head.find(b'\x00\x00\x01\xb3') != -1:
+        codec = 'mpeg video'
+
+    if codec is None:
+        return VideoProbe('mpeg-ps')
+
+    return VideoProbe('mpeg-ps', codec, _find_es_bit_depth(codec, head))
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from typing import Any, Literal, Generator, Protocol, Sequence, overload
+from typing import TYPE_CHECKING, Any, Iterable, Literal, Generator, Protocol, Sequence, overload
 
 from vstools import (
     ChromaLocationT, ColorRangeT, CustomRuntimeError, FieldBasedT, FileType, FileTypeMismatchError, IndexingType,
@@ -9,11 +11,17 @@ from vstools import (
     match_clip, to_arr, vs
 )
 
-from .indexers import IMWRI, LSMAS, BestSource, D2VWitch, DGIndex, DGIndexNV, Indexer
+from .formats import probe_video
+from .indexers import FileSignature, Indexer, indexer_capabilities
+from .utils import opt_int
+
+if TYPE_CHECKING:
+    from .indexers import DGIndexNV
 
 __all__ = [
     'parse_video_filepath',
-    'source'
+    'source',
+    'source_many'
 ]
 
 
@@ -129,52 +137,215 @@ def source(
             film_thr=film_thr, name=name, **kwargs
         )
 
-    clip = None
-    film_thr = float(min(100, film_thr))
+    from .indexers import DGIndexNV
 
     filepath, file = parse_video_filepath(filepath)
 
-    props = dict[str, Any]()
+    return _source_file(
+        filepath, file, bits, matrix, transfer, primaries, chroma_location, color_range, field_based,
+        ref, film_thr, name, DGIndexNV(), True, None, **kwargs
+    )
 
-    to_skip = to_arr(kwargs.get('_to_skip', []))
 
-    if file.ext is IndexingType.LWI:
-        clip = LSMAS.source_func(filepath, **kwargs)
-    elif file.file_type is FileType.IMAGE:
-        clip = IMWRI.source_func(filepath, **kwargs)
+def source_many(
+    filepaths: Iterable[SPathLike | Sequence[SPathLike]],
+    bits: int | None = None, *,
+    matrix: MatrixT | None = None,
+    transfer: TransferT | None = None,
+    primaries: PrimariesT | None = None,
+    chroma_location: ChromaLocationT | None = None,
+    color_range: ColorRangeT | None = None,
+    field_based: FieldBasedT | None = None,
+    ref: vs.VideoNode | None = None,
+    film_thr: float = 99.0,
+    name: str | Literal[False] = False,
+    max_workers: int | None = None,
+    **kwargs: Any
+) -> list[vs.VideoNode | Exception]:
+    """
+    Batch version of `source`, the files are probed, indexed and sourced in parallel.
+
+    The available indexers are only resolved once for the whole batch.
+
+    :param max_workers:     Number of files handled concurrently, None to use every core.
+
+    :return:                Clips in the same order of `filepaths`. Files that couldn't be
+                            sourced get the exception that was raised for them instead.
+    """
+
+    from .indexers import DGIndexNV
+
+    filepaths = list(filepaths)
+
+    dgindexnv = DGIndexNV()
+
+    # existing .dgi files only need the plugin, the binary is only needed to index the other files
+    dgindexnv_index = shutil.which(str(dgindexnv.bin_path)) is not None
+
+    fallback_indexers = _get_fallback_indexers()
+
+    # worker threads have no current environment, the clips have to be made in the one of the caller
+    env = vs.get_current_environment()
+
+    def _source(path: SPathLike | Sequence[SPathLike]) -> vs.VideoNode:
+        filepath, file = parse_video_filepath(path)
+
+        with env.use():
+            return _source_file(
+                filepath, file, bits, matrix, transfer, primaries, chroma_location, color_range, field_based,
+                ref, film_thr, name, dgindexnv, dgindexnv_index, fallback_indexers, **kwargs
+            )
+
+    results = list[vs.VideoNode | Exception]()
+
+    with ThreadPoolExecutor(max_workers, 'vssource_source') as executor:
+        for future in [executor.submit(_source, path) for path in filepaths]:
+            if (error := future.exception()) is None:
+                results.append(future.result())
+            elif isinstance(error, Exception):
+                results.append(error)
+            else:
+                raise error
+
+    return results
+
+
+def _get_fallback_indexers() -> list[type[Indexer]]:
+    from .indexers import LSMAS, BestSource, D2VWitch, DGIndex
+
+    indexers = list[type[Indexer]]([LSMAS, D2VWitch, DGIndex])
+
+    try:
+        from vspreview import is_preview
+    except ImportError:
+        best_last = False
     else:
-        try:
-            if DGIndexNV in to_skip:
-                raise RuntimeError
+        best_last = is_preview()
+
+    if best_last:
+        indexers.append(BestSource)
+    else:
+        indexers.insert(0, BestSource)
+
+    return indexers
+
+
+def _get_file_signature(filepath: SPath) -> FileSignature:
+    probe = probe_video(filepath)
+
+    if probe.codec is not None:
+        return probe.container or filepath.suffix.lower(), probe.codec, probe.bit_depth
+
+    # containers the native probe doesn't know about
+    video_fmt, bitdepth = None, None
+
+    try:
+        from pymediainfo import MediaInfo  # type: ignore
+    except ImportError:
+        ...
+    else:
+        tracks = MediaInfo.parse(filepath, parse_speed=0.25).video_tracks
+
+        if tracks:
+            trackmeta = tracks[0].to_data()
+
+            if (video_format := trackmeta.get("format")) is not None:
+                video_fmt = str(video_format).strip().lower()
 
             try:
-                from pymediainfo import MediaInfo  # type: ignore
-            except ImportError:
+                bitdepth = opt_int(trackmeta.get('bit_depth'))
+            except ValueError:
                 ...
+
+    return filepath.suffix.lower(), video_fmt, bitdepth
+
+
+def _check_dgindexnv_support(signature: FileSignature) -> bool:
+    _, video_fmt, bitdepth = signature
+
+    if video_fmt == 'ffv1':
+        return False
+
+    return not (bitdepth is not None and video_fmt == 'avc' and bitdepth > 8)
+
+
+# source plugin errors, failed indexing runs, missing plugins or binaries and rejected arguments
+_INDEXER_ERRORS = (vs.Error, RuntimeError, AttributeError, OSError, ValueError)
+
+
+def _source_fallback(
+    filepath: SPath, bits: int | None, signature: FileSignature, indexers: Iterable[type[Indexer]]
+) -> vs.VideoNode | None:
+    # known working indexers are tried first and the known failing ones only if everything else fails
+    for indexerr in indexer_capabilities.sort_indexers(signature, indexers):
+        if indexer_capabilities.get_result(signature, indexerr) != 'rgb24':
+            try:
+                clip = indexerr.source(filepath, bits=bits)
+            except _INDEXER_ERRORS as e:
+                if 'bgr0 is not supported' not in str(e):
+                    indexer_capabilities.record_failure(signature, indexerr, filepath)
+                    continue
             else:
-                tracks = MediaInfo.parse(filepath, parse_speed=0.25).video_tracks
-                if tracks:
-                    trackmeta = tracks[0].to_data()
+                indexer_capabilities.record(signature, indexerr, 'works')
+                return clip
 
-                    video_format = trackmeta.get("format")
+        try:
+            clip = indexerr.source(filepath, format='rgb24', bits=bits)
+        except _INDEXER_ERRORS:
+            indexer_capabilities.record_failure(signature, indexerr, filepath)
+        else:
+            indexer_capabilities.record(signature, indexerr, 'rgb24')
+            return clip
+
+    return None
+
+
+def _source_file(
+    filepath: SPath, file: ParsedFile,
+    bits: int | None,
+    matrix: MatrixT | None,
+    transfer: TransferT | None,
+    primaries: PrimariesT | None,
+    chroma_location: ChromaLocationT | None,
+    color_range: ColorRangeT | None,
+    field_based: FieldBasedT | None,
+    ref: vs.VideoNode | None,
+    film_thr: float,
+    name: str | Literal[False],
+    dgindexnv: DGIndexNV | None,
+    dgindexnv_index: bool,
+    fallback_indexers: list[type[Indexer]] | None,
+    **kwargs: Any
+) -> vs.VideoNode:
+    from .indexers import IMWRI, LSMAS, DGIndexNV
+
+    clip = None
+    film_thr = float(min(100, film_thr))
 
-                    if video_format is not None:
-                        video_fmt = str(video_format).strip().lower()
+    props = dict[str, Any]()
 
-                        if video_fmt == 'ffv1':
-                            raise RuntimeError
+    to_skip = to_arr(kwargs.get('_to_skip', []))
 
-                        bitdepth = trackmeta.get('bit_depth')
+    if file.ext is IndexingType.LWI:
+        clip = LSMAS.source_func(filepath, **kwargs)
+    elif file.file_type is FileType.IMAGE:
+        clip = IMWRI.source_func(filepath, **kwargs)
+    else:
+        signature = _get_file_signature(filepath)
 
-                        if bitdepth is not None and video_fmt == 'avc' and int(bitdepth) > 8:
-                            raise RuntimeError
+        try:
+            if dgindexnv is None or DGIndexNV in to_skip:
+                raise RuntimeError
 
-            indexer, filepath_dgi = DGIndexNV(), SPath(filepath)
+            filepath_dgi = SPath(filepath)
 
             if filepath_dgi.suffix != '.dgi':
-                filepath_dgi = next(iter(indexer.index([filepath_dgi], False, False)))
+                if not dgindexnv_index or not _check_dgindexnv_support(signature):
+                    raise RuntimeError
+
+                filepath_dgi = next(iter(dgindexnv.index([filepath_dgi], False, False)))
 
-            idx_info = indexer.get_info(filepath_dgi, 0).footer
+            idx_info = dgindexnv.get_info(filepath_dgi, 0).footer
 
             props |= dict(DgiFieldOp=0, DgiOrder=idx_info.order, DgiFilm=idx_info.film)
 
@@ -183,36 +354,13 @@ def source(
                 indexer_kwargs |= dict(fieldop=1)
                 props |= dict(DgiFieldOp=1, _FieldBased=0)
 
-            clip = indexer.source_func(filepath_dgi, **indexer_kwargs)
+            clip = dgindexnv.source_func(filepath_dgi, **indexer_kwargs)
         except (RuntimeError, AttributeError, FileNotFoundError):
-            indexers = list[type[Indexer]]([LSMAS, D2VWitch, DGIndex])
-
-            try:
-                from vspreview import is_preview
-
-                best_last = is_preview()
-            except BaseException:
-                best_last = False
-
-            if best_last:
-                indexers.append(BestSource)
-            else:
-                indexers.insert(0, BestSource)
-
-            for indexerr in indexers:
-                if indexerr in to_skip:
-                    continue
-
-                try:
-                    clip = indexerr.source(filepath, bits=bits)
-                    break
-                except Exception as e:
-                    if 'bgr0 is not supported' in str(e):
-                        try:
-                            clip = indexerr.source(filepath, format='rgb24', bits=bits)
-                            break
-                        except Exception:
-                            ...
+            clip = _source_fallback(
+                filepath, bits, signature, [
+                    indexerr for indexerr in fallback_indexers or _get_fallback_indexers() if indexerr not in to_skip
+                ]
+            )
 
     if clip is None:
         raise CustomRuntimeError(f'None of the indexers you have installed work on this file! "{filepath}"')
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import mmap
+import os
 import re
+import sys
+from array import array
 from fractions import Fraction
-from functools import lru_cache, partial
-from typing import TYPE_CHECKING, Sequence
+from functools import partial
+from struct import Struct
+from typing import TYPE_CHECKING, Iterator, Sequence
 
-from vstools import CustomValueError, SPath, core, remap_frames, vs
+from vstools import CustomValueError, SPath, remap_frames, vs
 
-from ..dataclasses import D2VIndexFileInfo, D2VIndexFrameData, D2VIndexHeader
+from ..dataclasses import D2VIndexColumns, D2VIndexFileInfo, D2VIndexFrameData, D2VIndexHeader, D2VVTSData
 from ..rff import apply_rff_array, apply_rff_video, cut_array_on_ranges
-from .base import DVDExtIndexer
+from .base import DVDExtIndexer, LazySourceFunc
+from .cache import IndexInfoCache
 
 if TYPE_CHECKING:
     from ..formats.dvd.parsedvd import IFOX, IFO0Title
@@ -19,10 +25,20 @@ __all__ = [
 ]
 
 
+_SIDECAR_MAGIC = b'VSSD2VC\x00'
+_SIDECAR_VERSION = 1
+# magic, version, byteorder, index mtime, index size, rows
+_SIDECAR_HEADER = Struct('=8sBcxxxxxxqqQ')
+_SIDECAR_COLUMNS = (
+    ('info', 'I'), ('matrix', 'B'), ('file', 'I'), ('position', 'q'),
+    ('skip', 'I'), ('vob', 'I'), ('cell', 'I'), ('flags_offsets', 'Q'), ('flags', 'B')
+)
+
+
 class D2VWitch(DVDExtIndexer):
     _bin_path = 'd2vwitch'
     _ext = 'd2v'
-    _source_func = core.lazy.d2v.Source
+    _source_func = LazySourceFunc('d2v', 'Source')
 
     _default_args = ('--single-input', )
 
@@ -30,46 +46,78 @@ class D2VWitch(DVDExtIndexer):
         return list(map(str, [self._get_bin_path(), *files, '--output', output]))
 
     def update_video_filenames(self, index_path: SPath, filepaths: list[SPath]) -> None:
-        with open(index_path, 'r') as file:
-            file_content = file.read()
+        str_filepaths = list(map(str, filepaths))
 
-        lines = file_content.split('\n')
+        if not (head := self._read_index_head(index_path, 1)):
+            return self.file_corrupted(index_path)
 
-        str_filepaths = list(map(str, filepaths))
+        (lines, ), head_end, newline = head
 
-        if 'DGIndex' not in lines[0]:
-            self.file_corrupted(index_path)
+        if len(lines) < 2 or 'DGIndex' not in lines[0]:
+            return self.file_corrupted(index_path)
 
         if not (n_files := int(lines[1])) or n_files != len(str_filepaths):
-            self.file_corrupted(index_path)
-
-        end_videos = lines.index('')
+            return self.file_corrupted(index_path)
 
-        if lines[2:end_videos] == str_filepaths:
+        if lines[2:] == str_filepaths:
             return
 
-        lines[2:end_videos] = str_filepaths
+        self._rewrite_index_head(index_path, [[*lines[:2], *str_filepaths]], head_end, newline)
 
-        with open(index_path, 'w') as file:
-            file.write('\n'.join(lines))
-
-    @lru_cache
+    @IndexInfoCache.cached
     def get_info(self, index_path: SPath, file_idx: int = -1) -> D2VIndexFileInfo:
-        with open(index_path, 'r') as f:
-            file_content = f.read()
+        header, columns = self.get_columns(index_path)
+
+        frame_data = [
+            D2VIndexFrameData(
+                columns.matrix[i], 'I', columns.vob[i], columns.cell[i], columns.info[i],
+                columns.skip[i], columns.position[i], list(columns.get_frameflags(i))
+            )
+            for i in range(len(columns))
+            if file_idx == -1 or columns.file[i] == file_idx
+        ]
+
+        return D2VIndexFileInfo(index_path, file_idx, header, frame_data)
+
+    def get_columns(self, index_path: SPath) -> tuple[D2VIndexHeader, D2VIndexColumns]:
+        """
+        Stream the index and return its header and its frame data as columns.
+
+        The columns are persisted in a binary sidecar next to the index,
+        next time they're memory mapped from it instead of parsing the text again.
+        """
+
+        with open(index_path, 'r') as file:
+            lines = (line.rstrip('\r\n') for line in file)
 
-        lines = file_content.split('\n')
+            if 'DGIndex' not in next(lines, ''):
+                self.file_corrupted(index_path)
 
-        head, lines = lines[:2], lines[2:]
+            header = self._parse_header(lines)
 
-        if 'DGIndex' not in head[0]:
-            self.file_corrupted(index_path)
+            stat = os.stat(index_path)
+            sidecar = self._get_sidecar_path(index_path)
 
-        raw_header, lines = self._split_lines(self._split_lines(lines)[1])
+            if (columns := self._load_sidecar(sidecar, stat)) is None:
+                columns = self._parse_columns(lines)
+
+                self._write_sidecar(sidecar, stat, columns)
+
+        return header, columns
+
+    @classmethod
+    def _parse_header(cls, lines: Iterator[str]) -> D2VIndexHeader:
+        # skip the amount of files and the file list
+        for line in lines:
+            if not line:
+                break
 
         header = D2VIndexHeader()
 
-        for rlin in raw_header:
+        for rlin in lines:
+            if not rlin:
+                break
+
             if split_val := rlin.rstrip().split('='):
                 key: str = split_val[0].upper()
                 values: list[str] = ','.join(split_val[1:]).split(',')
@@ -100,69 +148,137 @@ class D2VWitch(DVDExtIndexer):
             elif key == 'LOCATION':
                 header.location = list(map(partial(int, base=16), values))
 
-        frame_data = list[D2VIndexFrameData]()
+        return header
 
-        if file_idx >= 0:
-            for rawline in lines:
-                if len(rawline) == 0:
-                    break
+    @classmethod
+    def _parse_columns(cls, lines: Iterator[str]) -> D2VIndexColumns:
+        info, matrix, file, position, skip, vob, cell, flags_offsets, flags = (
+            array(typecode) for _, typecode in _SIDECAR_COLUMNS
+        )
 
-                line = rawline.split(" ", maxsplit=7)
+        flags_offsets.append(0)
 
-                ffile_idx = int(line[2])
+        for rawline in lines:
+            if not rawline:
+                break
 
-                if ffile_idx < file_idx:
-                    continue
-                elif ffile_idx > file_idx:
-                    break
+            line = rawline.split()
 
-                frame_data.append(D2VIndexFrameData(
-                    int(line[1]), 'I', int(line[5]),
-                    int(line[6]), int(line[0], 16),
-                    int(line[4]), int(line[3]),
-                    list(int(a, 16) for a in line[7:])
-                ))
-        elif file_idx == -1:
-            for rawline in lines:
-                if len(rawline) == 0:
-                    break
-
-                line = rawline.split(" ")
-
-                frame_data.append(D2VIndexFrameData(
-                    int(line[1]), 'I', int(line[5]),
-                    int(line[6]), int(line[0], 16),
-                    int(line[4]), int(line[3]),
-                    list(int(a, 16) for a in line[7:])
+            info.append(int(line[0], 16))
+            matrix.append(int(line[1]))
+            file.append(int(line[2]))
+            position.append(int(line[3]))
+            skip.append(int(line[4]))
+            vob.append(int(line[5]))
+            cell.append(int(line[6]))
+
+            flags.extend(int(a, 16) for a in line[7:])
+            flags_offsets.append(len(flags))
+
+        return D2VIndexColumns(info, matrix, file, position, skip, vob, cell, flags_offsets, flags)
+
+    @classmethod
+    def _get_sidecar_path(cls, index_path: SPath) -> SPath:
+        return index_path.with_name(f'{index_path.name}.cols')
+
+    @classmethod
+    def _load_sidecar(cls, sidecar: SPath, stat: os.stat_result) -> D2VIndexColumns | None:
+        # the columns are copied out so the mapping is closed right away and doesn't keep the file locked
+        try:
+            with open(sidecar, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buff:
+                return cls._read_sidecar(buff, stat)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def _read_sidecar(cls, buff: mmap.mmap, stat: os.stat_result) -> D2VIndexColumns | None:
+        if len(buff) < _SIDECAR_HEADER.size:
+            return None
+
+        magic, version, byteorder, mtime, size, rows = _SIDECAR_HEADER.unpack_from(buff)
+
+        if (magic, version, byteorder, mtime, size) != (
+            _SIDECAR_MAGIC, _SIDECAR_VERSION, sys.byteorder[0].encode(), stat.st_mtime_ns, stat.st_size
+        ):
+            return None
+
+        offset = _SIDECAR_HEADER.size
+        columns: dict[str, array[int]] = {}
+
+        for name, typecode in _SIDECAR_COLUMNS:
+            if name == 'flags':
+                length = columns['flags_offsets'][-1]
+            else:
+                length = rows + (name == 'flags_offsets')
+
+            end = offset + length * array(typecode).itemsize
+
+            if end > len(buff):
+                return None
+
+            columns[name] = column = array(typecode)
+            column.frombytes(buff[offset:end])
+
+            offset = -(-end // 8) * 8
+
+        return D2VIndexColumns(**columns)
+
+    @classmethod
+    def _write_sidecar(cls, sidecar: SPath, stat: os.stat_result, columns: D2VIndexColumns) -> None:
+        temp = sidecar.with_name(f'{sidecar.name}.{os.getpid()}.tmp')
+
+        try:
+            with open(temp, 'wb') as file:
+                file.write(_SIDECAR_HEADER.pack(
+                    _SIDECAR_MAGIC, _SIDECAR_VERSION, sys.byteorder[0].encode(),
+                    stat.st_mtime_ns, stat.st_size, len(columns)
                 ))
 
-        return D2VIndexFileInfo(index_path, file_idx, header, frame_data)
+                for name, _ in _SIDECAR_COLUMNS:
+                    column = getattr(columns, name)
+                    assert isinstance(column, array)
 
-    def parse_vts(
-        self, title: IFO0Title, disable_rff: bool, vobidcellids_to_take: list[tuple[int, int]],
-        target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath]
-    ) -> tuple[vs.VideoNode, list[int], list[tuple[int, int]], list[int]]:
-        dvddd = self._d2v_vobid_frameset(vob_input_files, output_folder)
+                    file.write(column.tobytes())
+                    file.write(bytes(-file.tell() % 8))
+
+            os.replace(temp, sidecar)
+        except OSError:
+            # The sidecar is only a cache, a read-only folder shouldn't make indexing fail
+            temp.unlink(missing_ok=True)
+
+    def get_vts_data(
+        self, title_set_nr: int, target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath]
+    ) -> D2VVTSData:
+        fflags, vobids, progseq = self._d2v_collect_all_frameflags(vob_input_files, output_folder)
+
+        dvddd = self._get_vobid_frameset(vobids)
 
         if len(dvddd.keys()) == 1 and (0, 0) in dvddd.keys():
             raise CustomValueError(
                 'Youre indexer created a d2v file with only zeros for vobid cellid; '
-                'This usually means outdated/unpatched D2Vwitch', self.parse_vts
+                'This usually means outdated/unpatched D2Vwitch', self.get_vts_data
             )
 
-        frameranges = [x for y in [dvddd[a] for a in vobidcellids_to_take] for x in y]
-
-        fflags, vobids, progseq = self._d2v_collect_all_frameflags(vob_input_files, output_folder)
-
         index_file = self.index(vob_input_files, output_folder=output_folder)[0]
         node = self._source_func(index_file, rff=False)  # type: ignore
 
         assert len(node) == len(fflags) == len(vobids) == len(progseq)
 
-        progseq = cut_array_on_ranges(progseq, frameranges)
-        fflags = cut_array_on_ranges(fflags, frameranges)
-        vobids = cut_array_on_ranges(vobids, frameranges)
-        node = remap_frames(node, frameranges)
+        return D2VVTSData(node, fflags, vobids, progseq, dvddd)
+
+    def parse_vts(
+        self, title: IFO0Title, disable_rff: bool, vobidcellids_to_take: list[tuple[int, int]],
+        target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath], vts_data: D2VVTSData | None = None
+    ) -> tuple[vs.VideoNode, Sequence[int], Sequence[tuple[int, int]], list[int]]:
+        if vts_data is None:
+            vts_data = self.get_vts_data(title.title_set_nr, target_vts, output_folder, vob_input_files)
+
+        frameranges = [x for y in [vts_data.frameset[a] for a in vobidcellids_to_take] for x in y]
+
+        progseq = cut_array_on_ranges(vts_data.progseq, frameranges)
+        fflags = cut_array_on_ranges(vts_data.frameflags, frameranges)
+        vobids = cut_array_on_ranges(vts_data.vobids, frameranges)
+        node = remap_frames(vts_data.node, frameranges)
 
         rff = [(a & 1) for a in fflags]
 
@@ -179,43 +295,21 @@ class D2VWitch(DVDExtIndexer):
         self, files: Sequence[SPath], output_folder: SPath
     ) -> tuple[list[int], list[tuple[int, int]], list[int]]:
         index_file = self.index(files, output_folder=output_folder)[0]
-        index_info = self.get_info(index_file)
+        columns = self.get_columns(index_file)[1]
 
         frameflagslst = list[int]()
         vobidlst = list[tuple[int, int]]()
         progseqlst = list[int]()
 
-        for iframe in index_info.frame_data:
-            assert isinstance(iframe, D2VIndexFrameData)
+        for i in range(len(columns)):
+            vobcell = (columns.vob[i], columns.cell[i])
 
-            vobcell = (iframe.vob, iframe.cell)
+            progseq = int((columns.info[i] & 0b1000000000) != 0)
 
-            progseq = int((iframe.info & 0b1000000000) != 0)
+            frameflags = bytes(columns.get_frameflags(i)).replace(b'\xff', b'')
 
-            for a in iframe.frameflags:
-                if a != 0xFF:
-                    frameflagslst.append(a)
-                    vobidlst.append(vobcell)
-                    progseqlst.append(progseq)
+            frameflagslst.extend(frameflags)
+            vobidlst.extend([vobcell] * len(frameflags))
+            progseqlst.extend([progseq] * len(frameflags))
 
         return frameflagslst, vobidlst, progseqlst
-
-    def _d2v_vobid_frameset(
-        self, files: Sequence[SPath], output_folder: SPath
-    ) -> dict[tuple[int, int], list[tuple[int, int]]]:
-        _, vobids, _ = self._d2v_collect_all_frameflags(files, output_folder)
-
-        vobidset = dict[tuple[int, int], list[tuple[int, int]]]()
-        for i, a in enumerate(vobids):
-            if a not in vobidset:
-                vobidset[a] = [(i, i - 1)]
-
-            last = vobidset[a][-1]
-
-            if last[1] + 1 == i:
-                vobidset[a][-1] = (last[0], last[1] + 1)
-                continue
-
-            vobidset[a].append((i, i))
-
-        return vobidset
@@ -3,8 +3,9 @@ from __future__ import annotations
 import os
 import subprocess
 
-from vstools import SPath, core
+from vstools import SPath
 
+from .base import LazySourceFunc
 from .D2VWitch import D2VWitch
 
 __all__ = [
@@ -15,7 +16,7 @@ __all__ = [
 class DGIndex(D2VWitch):
     _bin_path = 'dgindex'
     _ext = 'd2v'
-    _source_func = core.lazy.d2v.Source
+    _source_func = LazySourceFunc('d2v', 'Source')
 
     def get_cmd(
         self, files: list[SPath], output: SPath,
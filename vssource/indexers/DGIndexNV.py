@@ -1,25 +1,47 @@
 from __future__ import annotations
 
+import mmap
 import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
 from fractions import Fraction
 from functools import lru_cache
-from typing import Sequence
+from typing import BinaryIO, Sequence
 
-from vstools import SPath, core
+from vstools import SPath
 
-from ..dataclasses import DGIndexFileInfo, DGIndexFooter, DGIndexFrameData, DGIndexHeader
-from ..utils import opt_int, opt_ints
-from .base import ExternalIndexer
+from ..dataclasses import DGIndexColumns, DGIndexFileInfo, DGIndexFooter, DGIndexFrameData, DGIndexHeader
+from ..utils import opt_int
+from .base import ExternalIndexer, LazySourceFunc
+from .cache import IndexInfoCache
 
 __all__ = [
     'DGIndexNV'
 ]
 
 
+# The footer always fits in here, it's only a handful of short lines
+_FOOTER_TAIL_SIZE = 4096
+
+_END_OF_FRAMES = re.compile(rb'\n\r?\n')
+
+
+@dataclass
+class _DGIndexLayout:
+    header: DGIndexHeader
+    video_sizes: list[int]
+    seq_values: array[int]
+    seq_offsets: array[int]
+    data_end: int
+    footer: DGIndexFooter
+
+
 class DGIndexNV(ExternalIndexer):
     _bin_path = 'DGIndexNV'
     _ext = 'dgi'
-    _source_func = core.lazy.dgdecodenv.DGSource
+    _source_func = LazySourceFunc('dgdecodenv', 'DGSource')
 
     def get_cmd(self, files: list[SPath], output: SPath) -> list[str]:
         return list(
@@ -31,22 +53,20 @@ class DGIndexNV(ExternalIndexer):
         )
 
     def update_video_filenames(self, index_path: SPath, filepaths: list[SPath]) -> None:
-        lines = index_path.read_lines()
-
         str_filepaths = list(map(str, filepaths))
 
-        if 'DGIndexNV' not in lines[0]:
-            self.file_corrupted(index_path)
+        if not (head := self._read_index_head(index_path, 2)):
+            return self.file_corrupted(index_path)
 
-        start_videos = lines.index('') + 1
-        end_videos = lines.index('', start_videos)
+        (head_lines, video_lines), head_end, newline = head
 
-        if end_videos - start_videos != len(str_filepaths):
-            self.file_corrupted(index_path)
+        if not head_lines or 'DGIndexNV' not in head_lines[0]:
+            return self.file_corrupted(index_path)
 
-        split_lines = [
-            line.split(' ') for line in lines[start_videos:end_videos]
-        ]
+        if len(video_lines) != len(str_filepaths):
+            return self.file_corrupted(index_path)
+
+        split_lines = [line.split(' ') for line in video_lines]
 
         current_paths = [line[:-1][0] for line in split_lines]
 
@@ -55,113 +75,187 @@ class DGIndexNV(ExternalIndexer):
 
         video_args = [line[-1:] for line in split_lines]
 
-        lines[start_videos:end_videos] = [
-            ' '.join([path, *args]) for path, args in zip(str_filepaths, video_args)
-        ]
+        video_lines = [' '.join([path, *args]) for path, args in zip(str_filepaths, video_args)]
 
-        index_path.write_lines(lines)
+        self._rewrite_index_head(index_path, [head_lines, video_lines], head_end, newline)
 
-    @lru_cache
+    @IndexInfoCache.cached
     def get_info(self, index_path: SPath, file_idx: int = -1) -> DGIndexFileInfo:
-        with open(index_path, 'r') as file:
-            file_content = file.read()
+        header, columns, footer = self.get_columns(index_path, file_idx)
 
-        lines = file_content.split('\n')
+        frame_data = [
+            DGIndexFrameData(matrix, pic_type, vob if vob >= 0 else None, cell if cell >= 0 else None)
+            for matrix, pic_type, vob, cell in zip(columns.matrix, columns.pic_type, columns.vob, columns.cell)
+        ]
 
-        head, lines = self._split_lines(lines)
+        return DGIndexFileInfo(index_path, file_idx, header, frame_data, footer)
 
-        if 'DGIndexNV' not in head[0]:
-            self.file_corrupted(index_path)
+    def get_columns(
+        self, index_path: SPath, file_idx: int = -1
+    ) -> tuple[DGIndexHeader, DGIndexColumns, DGIndexFooter]:
+        """
+        Return the header, the frame data of a single file as columns and the footer of the index.
 
-        vid_lines, lines = self._split_lines(lines)
-        raw_header, lines = self._split_lines(lines)
+        The offsets of every SEQ are indexed once per index file, so only
+        the byte range of the requested file has to be read and parsed.
+        """
 
-        header = DGIndexHeader()
+        with open(index_path, 'rb') as file:
+            if b'DGIndexNV' not in file.readline():
+                self.file_corrupted(index_path)
+
+        stat = os.stat(index_path)
+        layout = _scan_index(str(index_path), stat.st_mtime_ns, stat.st_size)
+
+        max_sector = sum([0, *layout.video_sizes[:file_idx + 1]])
+
+        idx_file_sector = [max_sector - layout.video_sizes[file_idx], max_sector]
+
+        first_seq = bisect_left(layout.seq_values, idx_file_sector[0])
+        last_seq = bisect_right(layout.seq_values, idx_file_sector[1])
+
+        matrix, vob, cell, pic_type = array('i'), array('i'), array('i'), list[str]()
+
+        if first_seq < last_seq:
+            start = layout.seq_offsets[first_seq]
+            end = layout.seq_offsets[last_seq] if last_seq < len(layout.seq_offsets) else layout.data_end
+
+            with open(index_path, 'rb') as file:
+                file.seek(start, os.SEEK_SET)
+                raw_frames = file.read(end - start).decode('utf-8', 'replace')
+
+            for rawline in raw_frames.splitlines():
+                line: Sequence[str | None] = [*rawline.split(" ", maxsplit=6), *([None] * 6)]
 
-        for rlin in raw_header:
-            if split_val := rlin.rstrip().split(' '):
-                key: str = split_val[0].upper()
-                values: list[str] = split_val[1:]
-            else:
-                continue
-
-            if key == 'DEVICE':
-                header.device = int(values[0])
-            elif key == 'DECODE_MODES':
-                header.decode_modes = list(map(int, values[0].split(',')))
-            elif key == 'STREAM':
-                header.stream = tuple(map(int, values))
-            elif key == 'RANGE':
-                header.ranges = list(map(int, values))
-            elif key == 'DEMUX':
-                continue
-            elif key == 'DEPTH':
-                header.depth = int(values[0])
-            elif key == 'ASPECT':
                 try:
-                    header.aspect = Fraction(*list(map(int, values)))
-                except ZeroDivisionError:
-                    header.aspect = Fraction(1, 1)
-                    if os.environ.get('VSSOURCE_DEBUG', False):
-                        print(ResourceWarning('Encountered video with 0/0 aspect ratio!'))
-            elif key == 'COLORIMETRY':
-                header.colorimetry = tuple(map(int, values))
-            elif key == 'PKTSIZ':
-                header.packet_size = int(values[0])
-            elif key == 'VPID':
-                header.vpid = int(values[0])
+                    int(str(line[0]).split(':')[0])
+                except ValueError:
+                    continue
 
-        video_sizes = [int(line[-1]) for line in [line.split(' ') for line in vid_lines]]
+                matrix.append(int(line[2] or 0) + 2)
+                pic_type.append(str(line[1]))
+                vob.append(-1 if (vob_id := opt_int(line[4])) is None else vob_id)
+                cell.append(-1 if (cell_id := opt_int(line[5])) is None else cell_id)
 
-        max_sector = sum([0, *video_sizes[:file_idx + 1]])
+        return replace(layout.header), DGIndexColumns(matrix, pic_type, vob, cell), replace(layout.footer)
 
-        idx_file_sector = [max_sector - video_sizes[file_idx], max_sector]
 
-        curr_SEQ, frame_data = 0, []
+@lru_cache(16)
+def _scan_index(index_path: str, mtime_ns: int, size: int) -> _DGIndexLayout:
+    with open(index_path, 'rb') as file:
+        offset = 0
 
-        for rawline in lines:
-            if len(rawline) == 0:
-                break
+        def _read_block(file: BinaryIO) -> list[str]:
+            nonlocal offset
 
-            line: Sequence[str | None] = [*rawline.split(" ", maxsplit=6), *([None] * 6)]
+            block = list[str]()
 
-            name = str(line[0])
+            for rawline in file:
+                offset += len(rawline)
 
-            if name == 'SEQ':
-                curr_SEQ = opt_int(line[1]) or 0
+                if not (line := rawline.decode('utf-8', 'replace').rstrip('\r\n')):
+                    break
 
-            if curr_SEQ < idx_file_sector[0]:
-                continue
-            elif curr_SEQ > idx_file_sector[1]:
-                break
+                block.append(line)
 
-            try:
-                int(name.split(':')[0])
-            except ValueError:
-                continue
+            return block
 
-            frame_data.append(DGIndexFrameData(
-                int(line[2] or 0) + 2, str(line[1]), *opt_ints(line[4:6])
-            ))
+        _read_block(file)
+        vid_lines = _read_block(file)
+        raw_header = _read_block(file)
 
-        footer = DGIndexFooter()
+        data_start = offset
 
-        for rlin in lines[-10:]:
-            if split_val := rlin.rstrip().split(' '):
-                values = [split_val[0], ' '.join(split_val[1:])]
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buff:
+            if (match := _END_OF_FRAMES.search(buff, data_start - 1)):
+                data_end = match.start() + 1
             else:
-                continue
+                data_end = len(buff)
 
-            for key in footer.__dict__.keys():
-                if key.split('_')[-1].upper() in values:
-                    if key == 'film':
-                        try:
-                            value = [float(v.replace('%', '')) for v in values if '%' in v][0]
-                        except IndexError:
-                            value = 0
-                    else:
-                        value = int(values[1])
+            # frames before the first SEQ are considered to be at sector 0
+            seq_values, seq_offsets = array('q', [0]), array('Q', [data_start])
 
-                    footer[key] = value
+            pos = data_start - 1
 
-        return DGIndexFileInfo(index_path, file_idx, header, frame_data, footer)
+            while (pos := buff.find(b'\nSEQ ', pos, data_end)) != -1:
+                line_end = buff.find(b'\n', pos + 1, data_end)
+
+                if line_end == -1:
+                    line_end = data_end
+
+                seq_values.append(opt_int(buff[pos + 1:line_end].decode().split(' ', maxsplit=6)[1]) or 0)
+                seq_offsets.append(pos + 1)
+
+                pos = line_end
+
+            raw_footer = buff[max(data_end, len(buff) - _FOOTER_TAIL_SIZE):].decode('utf-8', 'replace')
+
+    return _DGIndexLayout(
+        _parse_header(raw_header),
+        [int(line[-1]) for line in [line.split(' ') for line in vid_lines]],
+        seq_values, seq_offsets, data_end,
+        _parse_footer(raw_footer.replace('\r\n', '\n').split('\n')[-10:])
+    )
+
+
+def _parse_header(raw_header: list[str]) -> DGIndexHeader:
+    header = DGIndexHeader()
+
+    for rlin in raw_header:
+        if split_val := rlin.rstrip().split(' '):
+            key: str = split_val[0].upper()
+            values: list[str] = split_val[1:]
+        else:
+            continue
+
+        if key == 'DEVICE':
+            header.device = int(values[0])
+        elif key == 'DECODE_MODES':
+            header.decode_modes = list(map(int, values[0].split(',')))
+        elif key == 'STREAM':
+            header.stream = tuple(map(int, values))
+        elif key == 'RANGE':
+            header.ranges = list(map(int, values))
+        elif key == 'DEMUX':
+            continue
+        elif key == 'DEPTH':
+            header.depth = int(values[0])
+        elif key == 'ASPECT':
+            try:
+                header.aspect = Fraction(*list(map(int, values)))
+            except ZeroDivisionError:
+                header.aspect = Fraction(1, 1)
+                if os.environ.get('VSSOURCE_DEBUG', False):
+                    print(ResourceWarning('Encountered video with 0/0 aspect ratio!'))
+        elif key == 'COLORIMETRY':
+            header.colorimetry = tuple(map(int, values))
+        elif key == 'PKTSIZ':
+            header.packet_size = int(values[0])
+        elif key == 'VPID':
+            header.vpid = int(values[0])
+
+    return header
+
+
+def _parse_footer(raw_footer: list[str]) -> DGIndexFooter:
+    footer = DGIndexFooter()
+
+    for rlin in raw_footer:
+        if split_val := rlin.rstrip().split(' '):
+            values = [split_val[0], ' '.join(split_val[1:])]
+        else:
+            continue
+
+        for key in footer.__dict__.keys():
+            if key.split('_')[-1].upper() in values:
+                if key == 'film':
+                    try:
+                        value = [float(v.replace('%', '')) for v in values if '%' in v][0]
+                    except IndexError:
+                        value = 0
+                else:
+                    value = int(values[1])
+
+                footer[key] = value
+
+    return footer
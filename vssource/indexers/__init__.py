@@ -1,6 +1,36 @@
-from .base import *  # noqa: F401,F403
-from .D2VWitch import *  # noqa: F401,F403
-from .DGIndex import *  # noqa: F401,F403
-from .DGIndexNV import *  # noqa: F401,F403
-from .dvdsrc import *  # noqa: F401,F403
-from .misc import *  # noqa: F401,F403
+# ruff: noqa: F401, F403, F405
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+from .base import *
+from .cache import *
+from .capabilities import *
+
+if TYPE_CHECKING:
+    from .D2VWitch import *
+    from .DGIndex import *
+    from .DGIndexNV import *
+    from .dvdsrc import *
+    from .misc import *
+
+# the indexers are only imported once they're used
+__getattr__, __dir__ = lazy_exports(__name__, {
+    '.D2VWitch': ['D2VWitch'],
+    '.DGIndex': ['DGIndex'],
+    '.DGIndexNV': ['DGIndexNV'],
+    '.dvdsrc': ['DVDSRCIndexer'],
+    '.misc': ['BestSource', 'IMWRI', 'LSMAS', 'CarefulSource', 'FFMS2']
+})
+
+__all__ = [
+    'Indexer', 'ExternalIndexer', 'DVDIndexer', 'DVDExtIndexer',
+    'VSSourceFunc', 'LazySourceFunc', 'IndexProgress', 'IndexProgressCallback',
+
+    'IndexInfoCache', 'index_info_cache',
+
+    'FileSignature', 'IndexerResult', 'IndexerCapabilities', 'indexer_capabilities',
+
+    'D2VWitch', 'DGIndex', 'DGIndexNV', 'DVDSRCIndexer',
+    'BestSource', 'IMWRI', 'LSMAS', 'CarefulSource', 'FFMS2'
+]
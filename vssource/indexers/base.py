@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import errno
+import json
 import os
+import re
 import shutil
 import subprocess
+import sys
 import tempfile
+import time
 from abc import ABC, abstractmethod
-from hashlib import md5
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass
+from hashlib import blake2b, md5
+from inspect import isawaitable
 from os import name as os_name
-from typing import TYPE_CHECKING, Any, Callable, ClassVar, Iterable, Literal, Protocol, Sequence
+from threading import Lock
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterator, Callable, ClassVar, Iterable, Literal, Protocol, Self, Sequence
+)
 
 from vstools import (
     MISSING, ChromaLocationT, ColorRangeT, CustomRuntimeError, DataType, FieldBasedT, MatrixT, MissingT, PackageStorage,
@@ -16,26 +30,186 @@ from vstools import (
 
 from ..dataclasses import IndexFileType
 
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
 if TYPE_CHECKING:
     from ..formats.dvd.parsedvd import IFOX, IFO0Title
 
 
-PackageStorage()
-
-
 __all__ = [
     'Indexer', 'ExternalIndexer',
     'DVDIndexer', 'DVDExtIndexer',
 
-    'VSSourceFunc'
+    'VSSourceFunc', 'LazySourceFunc',
+
+    'IndexProgress', 'IndexProgressCallback'
 ]
 
 
+# Size of each of the blocks sampled at the head, middle and tail of a file for its fingerprint
+_FINGERPRINT_BLOCK_SIZE = 1 << 16
+
+_index_registry_lock = Lock()
+
+_PROGRESS_PERCENT = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+_OUTPUT_LINE_SPLIT = re.compile(rb'\r\n|\r|\n')
+
+# Lines of indexer output reported when it fails
+_ERROR_OUTPUT_LINES = 20
+
+# Seconds between attempts at taking an index lock held by another process on Windows
+_LOCK_RETRY_INTERVAL = 0.1
+
+
+def _write_console(chunk: bytes) -> None:
+    if (buffer := getattr(sys.stdout, 'buffer', None)) is not None:
+        buffer.write(chunk)
+        buffer.flush()
+    elif sys.stdout is not None:
+        sys.stdout.write(chunk.decode('utf-8', 'replace'))
+        sys.stdout.flush()
+
+
 class VSSourceFunc(Protocol):
     def __call__(self, path: DataType, *args: Any, **kwargs: Any) -> vs.VideoNode:
         ...
 
 
+class LazySourceFunc:
+    """Source function of a plugin, only looked up in the core once it's called."""
+
+    def __init__(self, namespace: str, name: str) -> None:
+        self.namespace = namespace
+        self.name = name
+
+    def resolve(self) -> Callable[..., vs.VideoNode]:
+        return getattr(getattr(core.lazy, self.namespace), self.name)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> vs.VideoNode:
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.namespace}.{self.name})'
+
+
+@dataclass
+class IndexProgress:
+    """A line of output of an indexer process, with the percentage it reports if any."""
+
+    output: SPath
+    line: str
+    percent: float | None = None
+
+
+IndexProgressCallback = Callable[[IndexProgress], Any]
+
+
+class _IndexLock:
+    """Exclusive inter-process lock guarding the creation of an index file."""
+
+    def __init__(self, output: SPath) -> None:
+        self.path = output.with_name(f'{output.name}.lock')
+        self._fd: int | None = None
+
+    def acquire(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+
+            try:
+                self._lock(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+
+            # the previous holder removes the file on release, a lock on it doesn't guard the path anymore
+            if self._is_current(fd):
+                break
+
+            self._unlock(fd)
+            os.close(fd)
+
+        self._fd = fd
+
+    def release(self) -> None:
+        if (fd := self._fd) is None:
+            return
+
+        self._fd = None
+
+        try:
+            if sys.platform != 'win32':
+                # removed while still held, so whoever waits on it notices and locks the path anew
+                self._unlink()
+
+            self._unlock(fd)
+        finally:
+            os.close(fd)
+
+        if sys.platform == 'win32':
+            # open files can't be removed here, if the next holder has it open it removes it in turn
+            self._unlink()
+
+    def _lock(self, fd: int) -> None:
+        if sys.platform == 'win32':
+            while True:
+                os.lseek(fd, 0, os.SEEK_SET)
+
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                except OSError as e:
+                    # only wait if it's held by someone else
+                    if e.errno not in (errno.EDEADLOCK, errno.EACCES):
+                        raise
+
+                    time.sleep(_LOCK_RETRY_INTERVAL)
+                    continue
+
+                break
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock(self, fd: int) -> None:
+        if sys.platform == 'win32':
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _is_current(self, fd: int) -> bool:
+        try:
+            return os.path.samestat(os.fstat(fd), os.stat(self.path))
+        except FileNotFoundError:
+            return False
+
+    def _unlink(self) -> None:
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    async def acquire_async(self) -> None:
+        acquire = asyncio.ensure_future(asyncio.to_thread(self.acquire))
+
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # the thread can't be interrupted, give the lock back as soon as it gets it
+            acquire.add_done_callback(lambda _: self.release())
+            raise
+
+    def __enter__(self) -> Self:
+        self.acquire()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.release()
+
+
 class Indexer(ABC):
     """Abstract indexer interface."""
 
@@ -56,7 +230,38 @@ class Indexer(ABC):
         return '_'.join([file.name for file in files])
 
     @classmethod
-    def get_videos_hash(cls, files: list[SPath]) -> str:
+    def get_file_fingerprint(cls, file: SPath) -> bytes:
+        """
+        Fast content fingerprint of a file.
+
+        Only hashes size, mtime and a fixed size block at the head, middle and tail of the file,
+        so it's independent of the name and location of the file and doesn't read it whole.
+        """
+
+        stat = file.stat()
+        size = stat.st_size
+
+        hasher = blake2b(size.to_bytes(8, 'little') + stat.st_mtime_ns.to_bytes(8, 'little', signed=True))
+
+        offsets = {0, max(0, (size - _FINGERPRINT_BLOCK_SIZE) // 2), max(0, size - _FINGERPRINT_BLOCK_SIZE)}
+
+        with open(file, 'rb') as f:
+            for offset in sorted(offsets):
+                f.seek(offset)
+                hasher.update(f.read(_FINGERPRINT_BLOCK_SIZE))
+
+        return hasher.digest()
+
+    @classmethod
+    def get_videos_hash(cls, files: list[SPath], content: bool = False) -> str:
+        if content:
+            hasher = blake2b(digest_size=16)
+
+            for file in files:
+                hasher.update(cls.get_file_fingerprint(file))
+
+            return hasher.hexdigest()
+
         lenght = sum(file.stat().st_size for file in files)
         to_hash = lenght.to_bytes(32, 'little') + cls.get_joined_names(files).encode()
         return md5(to_hash).hexdigest()
@@ -125,8 +330,16 @@ class ExternalIndexer(Indexer):
     def __init__(
         self, *, bin_path: SPathLike | MissingT = MISSING, ext: str | MissingT = MISSING,
         force: bool = True, default_out_folder: SPathLike | Literal[False] | None = None,
-        **kwargs: Any
+        content_hash: bool = False, max_workers: int | None = 1, **kwargs: Any
     ) -> None:
+        """
+        :param content_hash:    Name index files after a fingerprint of the content of the videos
+                                instead of their names and total size. Indexes are then also found
+                                again after the videos have been moved to another folder.
+        :param max_workers:     Maximum number of indexer processes run concurrently when indexing files
+                                from multiple folders or with `split_files`. None to use every core.
+        """
+
         super().__init__(force=force, **kwargs)
 
         if bin_path is MISSING:
@@ -138,6 +351,8 @@ class ExternalIndexer(Indexer):
         self.bin_path = SPath(bin_path)
         self.ext = ext
         self.default_out_folder = default_out_folder
+        self.content_hash = content_hash
+        self.max_workers = max_workers
 
     @abstractmethod
     def get_cmd(self, files: list[SPath], output: SPath) -> list[str]:
@@ -158,32 +373,92 @@ class ExternalIndexer(Indexer):
             raise FileNotFoundError(f'Indexer: `{self.bin_path}` was not found{" in PATH" if os_name == "nt" else ""}!')
         return SPath(bin_path)
 
+    def _get_index_cmd(self, files: list[SPath], output: SPath, cmd_args: Sequence[str]) -> list[str]:
+        return list(map(str, (*self.get_cmd(files, output), *cmd_args, *self._default_args)))
+
+    def _get_index_error(self, output_lines: Iterable[str]) -> CustomRuntimeError:
+        output = ''.join(f'\n\t{line}' for line in output_lines if line.strip())
+
+        return CustomRuntimeError(f"There was an error while running the {self.bin_path} command!: {output}")
+
     def _run_index(self, files: list[SPath], output: SPath, cmd_args: Sequence[str]) -> None:
         output.mkdirp()
 
-        proc = subprocess.Popen(
-            list(map(str, (*self.get_cmd(files, output), *cmd_args, *self._default_args))),
-            text=True, encoding='utf-8', shell=os_name == 'nt', cwd=output.get_folder().to_str()
+        last_lines = deque[str](maxlen=_ERROR_OUTPUT_LINES)
+        pending = b''
+
+        # the output is still shown while indexing, only its tail is kept for the error message
+        with subprocess.Popen(
+            self._get_index_cmd(files, output, cmd_args), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            shell=os_name == 'nt', cwd=output.get_folder().to_str()
+        ) as proc:
+            assert proc.stdout
+
+            while chunk := proc.stdout.read1(1 << 16):
+                _write_console(chunk)
+
+                *lines, pending = _OUTPUT_LINE_SPLIT.split(pending + chunk)
+                last_lines.extend(line.decode('utf-8', 'replace') for line in lines)
+
+        last_lines.append(pending.decode('utf-8', 'replace'))
+
+        if proc.returncode:
+            raise self._get_index_error(last_lines)
+
+    async def _run_index_async(
+        self, files: list[SPath], output: SPath, cmd_args: Sequence[str],
+        progress: IndexProgressCallback | None = None, timeout: float | None = None
+    ) -> None:
+        output.mkdirp()
+
+        proc = await asyncio.create_subprocess_exec(
+            *self._get_index_cmd(files, output, cmd_args),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, cwd=output.get_folder().to_str()
         )
 
-        status = proc.wait()
+        last_lines = deque[str](maxlen=_ERROR_OUTPUT_LINES)
 
-        if status:
-            stderr = stdout = ''
+        async def _report(raw_line: bytes) -> None:
+            if not (line := raw_line.decode('utf-8', 'replace').strip()):
+                return
 
-            if proc.stderr:
-                stderr = proc.stderr.read().strip()
-                if stderr:
-                    stderr = f'\n\t{stderr}'
+            last_lines.append(line)
 
-            if proc.stdout:
-                stdout = proc.stdout.read().strip()
-                if stdout:
-                    stdout = f'\n\t{stdout}'
+            if progress is None:
+                return
 
-            raise CustomRuntimeError(
-                f"There was an error while running the {self.bin_path} command!: {stderr}{stdout}"
-            )
+            percent = float(match.group(1)) if (match := _PROGRESS_PERCENT.search(line)) else None
+
+            if isawaitable(result := progress(IndexProgress(output, line, percent))):
+                await result
+
+        try:
+            async with asyncio.timeout(timeout):
+                assert proc.stdout
+
+                pending = b''
+
+                # indexers mostly redraw their progress with carriage returns
+                while chunk := await proc.stdout.read(1 << 12):
+                    *lines, pending = _OUTPUT_LINE_SPLIT.split(pending + chunk)
+
+                    for raw_line in lines:
+                        await _report(raw_line)
+
+                await _report(pending)
+
+                status = await proc.wait()
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+            # a killed indexer leaves a partial index behind
+            output.unlink(missing_ok=True)
+            raise
+
+        if status:
+            raise self._get_index_error(last_lines)
 
     def get_out_folder(
         self, output_folder: SPathLike | Literal[False] | None = None, file: SPath | None = None
@@ -199,6 +474,52 @@ class ExternalIndexer(Indexer):
     def get_idx_file_path(self, path: SPath) -> SPath:
         return path.with_suffix(f'.{self.ext}')
 
+    @classmethod
+    def _read_index_head(cls, index_path: SPath, n_blocks: int) -> tuple[list[list[str]], int, bytes] | None:
+        """
+        Read only the first `n_blocks` blocks of lines, separated by a blank line, of an index file.
+
+        Returns the blocks, the offset right after the blank line closing the last one
+        and the newline used by the file, or None if the file ends before that.
+        """
+
+        blocks, offset, newline = [list[str]()], 0, b'\n'
+
+        with open(index_path, 'rb') as file:
+            for rawline in file:
+                if not offset and rawline.endswith(b'\r\n'):
+                    newline = b'\r\n'
+
+                offset += len(rawline)
+
+                if line := rawline.rstrip(b'\r\n').decode('utf-8', 'surrogateescape'):
+                    blocks[-1].append(line)
+                elif len(blocks) == n_blocks:
+                    return blocks, offset, newline
+                else:
+                    blocks.append([])
+
+        return None
+
+    @classmethod
+    def _rewrite_index_head(cls, index_path: SPath, blocks: list[list[str]], head_end: int, newline: bytes) -> None:
+        """Replace the head read by `_read_index_head` with `blocks`, streaming the rest to a new file."""
+
+        head = newline.join(line.encode('utf-8', 'surrogateescape') for block in blocks for line in (*block, ''))
+
+        tmp_path = index_path.with_name(f'{index_path.name}.{os.getpid()}.tmp')
+
+        try:
+            with open(index_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                dst.write(head + newline)
+
+                src.seek(head_end)
+                shutil.copyfileobj(src, dst, 1 << 20)
+
+            os.replace(tmp_path, index_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
     def file_corrupted(self, index_path: SPath) -> None:
         if self.force:
             try:
@@ -212,44 +533,227 @@ class ExternalIndexer(Indexer):
         self, files: Sequence[SPath], force: bool = False, split_files: bool = False,
         output_folder: SPathLike | Literal[False] | None = None, *cmd_args: str
     ) -> list[SPath]:
-        files = to_arr(files)
+        jobs = self._get_index_jobs(to_arr(files), split_files, output_folder)
 
-        if len(unique_folders := list(set([f.get_folder().to_str() for f in files]))) > 1:
-            return [
-                c for s in (
-                    self.index(
-                        [f for f in files if f.get_folder().to_str() == folder],
-                        force, split_files, output_folder
-                    )
-                    for folder in unique_folders
-                ) for c in s
-            ]
+        # the same index could be requested more than once, e.g. equal videos in different folders
+        unique_jobs = list({output: (files, output) for files, output in jobs}.values())
 
-        dest_folder = self.get_out_folder(output_folder, files[0])
+        if (max_workers := self.max_workers) is None:
+            max_workers = os.cpu_count() or 1
 
-        files = list(sorted(set(files)))
+        if min(max_workers, len(unique_jobs)) <= 1:
+            for job_files, output in unique_jobs:
+                self._index_job(job_files, output, force, cmd_args)
+        else:
+            with ThreadPoolExecutor(min(max_workers, len(unique_jobs)), 'vssource_index') as executor:
+                futures = [
+                    executor.submit(self._index_job, job_files, output, force, cmd_args)
+                    for job_files, output in unique_jobs
+                ]
 
-        hash_str = self.get_videos_hash(files)
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    executor.shutdown(cancel_futures=True)
+                    raise
 
-        def _index(files: list[SPath], output: SPath) -> None:
-            if output.is_file():
-                if output.stat().st_size == 0 or force:
-                    output.unlink()
-                else:
-                    return self.update_video_filenames(output, files)
-            return self._run_index(files, output, cmd_args)
+        return [output for _, output in jobs]
+
+    def _get_index_jobs(
+        self, files: list[SPath], split_files: bool, output_folder: SPathLike | Literal[False] | None
+    ) -> list[tuple[list[SPath], SPath]]:
+        jobs = list[tuple[list[SPath], SPath]]()
+
+        for folder in dict.fromkeys(f.get_folder().to_str() for f in files):
+            folder_files = list(sorted(set(f for f in files if f.get_folder().to_str() == folder)))
+
+            dest_folder = self.get_out_folder(output_folder, folder_files[0])
+
+            hash_str = self.get_videos_hash(folder_files, self.content_hash)
+
+            if not split_files:
+                jobs.append((folder_files, self.get_video_idx_path(
+                    dest_folder, hash_str, 'JOINED' if len(folder_files) > 1 else 'SINGLE'
+                )))
+            else:
+                jobs.extend(
+                    ([file], self.get_video_idx_path(dest_folder, hash_str, file.name)) for file in folder_files
+                )
+
+        return jobs
+
+    def _prepare_index_job(self, files: list[SPath], output: SPath, force: bool) -> bool:
+        # returns whether the indexer has to be run
+        if self.content_hash and not force and not output.is_file():
+            self._restore_relocated_index(output)
+
+        if output.is_file() and (output.stat().st_size == 0 or force):
+            output.unlink()
+
+        if output.is_file():
+            self.update_video_filenames(output, files)
+
+        # a corrupted index gets deleted while updating it
+        return not output.is_file()
+
+    def _finish_index_job(self, output: SPath) -> None:
+        if self.content_hash and output.is_file():
+            self._register_index(output)
+
+    @classmethod
+    def _get_tmp_index_path(cls, output: SPath) -> SPath:
+        # keep the suffix, some indexers append it on their own
+        return output.with_name(f'{output.stem}.{os.getpid()}.tmp{output.suffix}')
+
+    def _index_job(self, files: list[SPath], output: SPath, force: bool, cmd_args: Sequence[str]) -> None:
+        # other processes wait for the index being built and then reuse it
+        with _IndexLock(output):
+            if self._prepare_index_job(files, output, force):
+                tmp_output = self._get_tmp_index_path(output)
+
+                try:
+                    self._run_index(files, tmp_output, cmd_args)
+
+                    os.replace(tmp_output, output)
+                finally:
+                    tmp_output.unlink(missing_ok=True)
+
+            self._finish_index_job(output)
+
+    async def index_async(
+        self, files: Sequence[SPath], force: bool = False, split_files: bool = False,
+        output_folder: SPathLike | Literal[False] | None = None, *cmd_args: str,
+        progress: IndexProgressCallback | None = None, timeout: float | None = None
+    ) -> list[SPath]:
+        """
+        Asyncio version of `index`, `max_workers` indexer processes are run concurrently.
+
+        :param progress:    Called with every line of output of the indexers, parsed into an `IndexProgress`.
+                            If it returns an awaitable, it's awaited before reading further output.
+        :param timeout:     Seconds after which a single indexer process is killed, raising a TimeoutError.
+
+        Cancelling the task kills the running indexers and removes their partial index files.
+        """
+
+        jobs = await asyncio.to_thread(self._get_index_jobs, to_arr(files), split_files, output_folder)
+
+        unique_jobs = list({output: (files, output) for files, output in jobs}.values())
 
-        if not split_files:
-            output = self.get_video_idx_path(dest_folder, hash_str, 'JOINED' if len(files) > 1 else 'SINGLE')
-            _index(files, output)
-            return [output]
+        if (max_workers := self.max_workers) is None:
+            max_workers = os.cpu_count() or 1
 
-        outputs = [self.get_video_idx_path(dest_folder, hash_str, file.name) for file in files]
+        semaphore = asyncio.Semaphore(max(max_workers, 1))
 
-        for file, output in zip(files, outputs):
-            _index([file], output)
+        async def _index(files: list[SPath], output: SPath) -> None:
+            async with semaphore:
+                await (lock := _IndexLock(output)).acquire_async()
 
-        return outputs
+                try:
+                    if await asyncio.to_thread(self._prepare_index_job, files, output, force):
+                        tmp_output = self._get_tmp_index_path(output)
+
+                        try:
+                            await self._run_index_async(files, tmp_output, cmd_args, progress, timeout)
+
+                            os.replace(tmp_output, output)
+                        finally:
+                            tmp_output.unlink(missing_ok=True)
+
+                    await asyncio.to_thread(self._finish_index_job, output)
+                finally:
+                    lock.release()
+
+        tasks = [asyncio.ensure_future(_index(job_files, output)) for job_files, output in unique_jobs]
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return [output for _, output in jobs]
+
+    async def iter_index_progress(
+        self, files: Sequence[SPath], force: bool = False, split_files: bool = False,
+        output_folder: SPathLike | Literal[False] | None = None, *cmd_args: str, timeout: float | None = None
+    ) -> AsyncIterator[IndexProgress]:
+        """
+        Run `index_async` and yield its progress as it comes.
+
+        Errors of the indexers are raised at the end of the iteration,
+        stopping the iteration early cancels the indexing.
+        """
+
+        queue = asyncio.Queue[IndexProgress | None]()
+
+        task = asyncio.ensure_future(
+            self.index_async(
+                files, force, split_files, output_folder, *cmd_args, progress=queue.put_nowait, timeout=timeout
+            )
+        )
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+
+                with suppress(asyncio.CancelledError):
+                    await task
+
+    @classmethod
+    def _get_index_registry(cls) -> tuple[SPath, dict[str, str]]:
+        registry_path = PackageStorage(package_name='vssource').get_file('index_registry.json')
+
+        try:
+            with open(registry_path, 'r') as file:
+                return registry_path, dict(json.load(file))
+        except (OSError, ValueError, TypeError):
+            return registry_path, {}
+
+    @classmethod
+    def _register_index(cls, output: SPath) -> None:
+        with _index_registry_lock:
+            registry_path, registry = cls._get_index_registry()
+
+            if registry.get(output.name) == (output_path := str(output.resolve())):
+                return
+
+            registry[output.name] = output_path
+
+            tmp_path = registry_path.with_name(f'{registry_path.name}.{os.getpid()}.tmp')
+
+            try:
+                with open(tmp_path, 'w') as file:
+                    json.dump(registry, file, indent=4)
+
+                os.replace(tmp_path, registry_path)
+            except OSError:
+                pass
+
+    @classmethod
+    def _restore_relocated_index(cls, output: SPath) -> None:
+        # index files named after a content hash are the same wherever the videos are
+        if not (known_path := cls._get_index_registry()[1].get(output.name)):
+            return
+
+        known_index = SPath(known_path)
+
+        if known_index == output.resolve() or not known_index.is_file() or not known_index.stat().st_size:
+            return
+
+        try:
+            shutil.copyfile(known_index, output)
+        except OSError:
+            return
 
     def get_video_idx_path(self, folder: SPath, file_hash: str, video_name: SPathLike) -> SPath:
         vid_name = SPath(video_name).stem
@@ -277,16 +781,63 @@ class ExternalIndexer(Indexer):
             bits, matrix, transfer, primaries, chroma_location, color_range, field_based
         )
 
+    @inject_self
+    async def source_async(
+        self, file: SPathLike | Sequence[SPathLike],
+        bits: int | None = None, *,
+        matrix: MatrixT | None = None,
+        transfer: TransferT | None = None,
+        primaries: PrimariesT | None = None,
+        chroma_location: ChromaLocationT | None = None,
+        color_range: ColorRangeT | None = None,
+        field_based: FieldBasedT | None = None,
+        progress: IndexProgressCallback | None = None,
+        timeout: float | None = None,
+        **kwargs: Any
+    ) -> vs.VideoNode:
+        """Asyncio version of `source`, the files are indexed with `index_async`."""
+
+        index_files = await self.index_async(self.normalize_filenames(file), progress=progress, timeout=timeout)
+
+        return self._source(
+            (self.source_func(idx_filename.to_str(), **kwargs) for idx_filename in index_files),
+            bits, matrix, transfer, primaries, chroma_location, color_range, field_based
+        )
+
 
 class DVDIndexer:
     iso_path: SPath
 
+    def get_vts_data(
+        self, title_set_nr: int, target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath]
+    ) -> Any:
+        """Per VTS data that `parse_vts` calls for titles of the same VTS can share, None if there's none."""
+
+        return None
+
     def parse_vts(
         self, title: IFO0Title, disable_rff: bool, vobidcellids_to_take: list[tuple[int, int]],
-        target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath]
-    ) -> tuple[vs.VideoNode, list[int], list[tuple[int, int]], list[int]]:
+        target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath], vts_data: Any = None
+    ) -> tuple[vs.VideoNode, Sequence[int], Sequence[tuple[int, int]], list[int]]:
         raise NotImplementedError
 
+    @staticmethod
+    def _get_vobid_frameset(vobids: Iterable[tuple[int, int]]) -> dict[tuple[int, int], list[tuple[int, int]]]:
+        vobidset = dict[tuple[int, int], list[tuple[int, int]]]()
+        for i, a in enumerate(vobids):
+            if a not in vobidset:
+                vobidset[a] = [(i, i - 1)]
+
+            last = vobidset[a][-1]
+
+            if last[1] + 1 == i:
+                vobidset[a][-1] = (last[0], last[1] + 1)
+                continue
+
+            vobidset[a].append((i, i))
+
+        return vobidset
+
 
 class DVDExtIndexer(ExternalIndexer, DVDIndexer):
     ...
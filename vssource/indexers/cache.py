@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+import pickle
+from collections import OrderedDict
+from functools import wraps
+from hashlib import sha1
+from threading import RLock
+from typing import TYPE_CHECKING, Any, Callable, Hashable, TypeVar
+
+from vstools import PackageStorage, SPath, SPathLike
+
+if TYPE_CHECKING:
+    from .base import ExternalIndexer
+
+__all__ = [
+    'IndexInfoCache',
+
+    'index_info_cache'
+]
+
+
+IndexerT = TypeVar('IndexerT', bound='ExternalIndexer')
+InfoT = TypeVar('InfoT')
+
+# Bump whenever the pickled index info dataclasses change layout
+_DISK_CACHE_VERSION = 1
+
+# What a missing, truncated, stale or otherwise unusable pickle can raise
+_UNPICKLE_ERRORS = (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError)
+_PICKLE_ERRORS = (OSError, pickle.PicklingError, AttributeError, TypeError)
+
+
+class IndexInfoCache:
+    """
+    Size bounded LRU cache of parsed index info, shared between every indexer instance.
+
+    Entries are keyed by indexer, index path, mtime and size of the index, so a re-indexed
+    file is never served stale. The optional disk tier pickles entries under a `PackageStorage`,
+    making them available to other processes and later runs too.
+    """
+
+    def __init__(
+        self, maxsize: int = 64, disk: bool = False, storage_folder: SPathLike | None = None
+    ) -> None:
+        self.maxsize = maxsize
+        self.disk = disk
+        self.storage_folder = storage_folder
+
+        self._entries = OrderedDict[Hashable, Any]()
+        self._lock = RLock()
+
+    def get(
+        self, indexer: ExternalIndexer, index_path: SPathLike, file_idx: int, parse: Callable[[], InfoT]
+    ) -> InfoT:
+        """Return the cached info of the index, calling `parse` and caching its result on a miss."""
+
+        stat = os.stat(index_path)
+
+        key = (
+            type(indexer).__module__, type(indexer).__qualname__,
+            os.path.abspath(index_path), stat.st_mtime_ns, stat.st_size, file_idx
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if (info := self._load(key)) is None:
+            info = parse()
+
+            self._dump(key, info)
+
+        with self._lock:
+            self._entries[key] = info
+
+            while len(self._entries) > max(self.maxsize, 0):
+                self._entries.popitem(False)
+
+        return info
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop every entry in memory and, if `disk` is True, in the disk tier too."""
+
+        with self._lock:
+            self._entries.clear()
+
+        if disk:
+            for file in self._get_storage().folder.glob('index_info_*.pickle'):
+                try:
+                    file.unlink()
+                except OSError:
+                    pass
+
+    def _get_storage(self) -> PackageStorage:
+        return PackageStorage(self.storage_folder, package_name='vssource')
+
+    def _get_disk_path(self, key: Hashable) -> SPath:
+        digest = sha1(repr((_DISK_CACHE_VERSION, key)).encode()).hexdigest()
+
+        return self._get_storage().get_file(f'index_info_{digest}', ext='.pickle')
+
+    def _load(self, key: Hashable) -> Any:
+        if not self.disk:
+            return None
+
+        try:
+            with open(self._get_disk_path(key), 'rb') as file:
+                stored_key, info = pickle.load(file)
+        except _UNPICKLE_ERRORS:
+            return None
+
+        return info if stored_key == key else None
+
+    def _dump(self, key: Hashable, info: Any) -> None:
+        if not self.disk:
+            return
+
+        path = self._get_disk_path(key)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+
+        try:
+            with open(tmp_path, 'wb') as file:
+                pickle.dump((key, info), file, pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tmp_path, path)
+        except _PICKLE_ERRORS:
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    @staticmethod
+    def cached(
+        func: Callable[[IndexerT, SPath, int], InfoT]
+    ) -> Callable[[IndexerT, SPath, int], InfoT]:
+        """Decorator for `get_info` methods making them go through the shared `index_info_cache`."""
+
+        @wraps(func)
+        def _wrapper(self: IndexerT, index_path: SPath, file_idx: int = -1) -> InfoT:
+            return index_info_cache.get(self, index_path, file_idx, lambda: func(self, index_path, file_idx))
+
+        return _wrapper
+
+
+index_info_cache = IndexInfoCache()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import os
+from threading import RLock
+from typing import TYPE_CHECKING, Iterable, Literal, TypeVar
+
+from vstools import PackageStorage, SPath, SPathLike
+
+if TYPE_CHECKING:
+    from .base import Indexer
+
+__all__ = [
+    'FileSignature', 'IndexerResult',
+
+    'IndexerCapabilities',
+
+    'indexer_capabilities'
+]
+
+
+IndexerT = TypeVar('IndexerT', bound='type[Indexer]')
+
+# Container, codec and bit depth of a video file
+FileSignature = tuple[str, str | None, int | None]
+
+# `rgb24` means that the indexer only works when asked for rgb24 output
+IndexerResult = Literal['works', 'rgb24', 'fails']
+
+
+class IndexerCapabilities:
+    """
+    Registry of which indexers worked or failed on files with a given signature.
+
+    It's kept in memory and, with `disk`, also as a json under a `PackageStorage`.
+    An indexer is only recorded as failing once it failed on `fail_threshold` different files,
+    so a single broken file doesn't make it skipped for every file with the same signature.
+    """
+
+    def __init__(
+        self, disk: bool = False, storage_folder: SPathLike | None = None, fail_threshold: int = 2
+    ) -> None:
+        self.disk = disk
+        self.storage_folder = storage_folder
+        self.fail_threshold = fail_threshold
+
+        self._results = dict[str, dict[str, IndexerResult]]()
+        self._failures = dict[tuple[str, str], set[str]]()
+        self._loaded = False
+        self._lock = RLock()
+
+    @staticmethod
+    def _get_key(signature: FileSignature) -> str:
+        return '|'.join('' if value is None else str(value) for value in signature)
+
+    @staticmethod
+    def _get_name(indexer: type[Indexer]) -> str:
+        return f'{indexer.__module__}.{indexer.__qualname__}'
+
+    def _get_storage_path(self) -> SPath:
+        return PackageStorage(self.storage_folder, package_name='vssource').get_file('indexer_capabilities.json')
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded or not self.disk:
+            return
+
+        self._loaded = True
+
+        try:
+            with open(self._get_storage_path(), 'r') as file:
+                stored = dict(json.load(file))
+        except (OSError, ValueError, TypeError):
+            return
+
+        for key, results in stored.items():
+            self._results.setdefault(key, {}).update(
+                (name, result) for name, result in dict(results).items() if result in ('works', 'rgb24', 'fails')
+            )
+
+    def _save(self) -> None:
+        if not self.disk:
+            return
+
+        path = self._get_storage_path()
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump(self._results, file, indent=4)
+
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+
+    def get_result(self, signature: FileSignature, indexer: type[Indexer]) -> IndexerResult | None:
+        with self._lock:
+            self._ensure_loaded()
+
+            return self._results.get(self._get_key(signature), {}).get(self._get_name(indexer))
+
+    def record(self, signature: FileSignature, indexer: type[Indexer], result: IndexerResult) -> None:
+        with self._lock:
+            self._ensure_loaded()
+
+            key, name = self._get_key(signature), self._get_name(indexer)
+
+            if result != 'fails':
+                self._failures.pop((key, name), None)
+
+            results = self._results.setdefault(key, {})
+
+            if results.get(name) == result:
+                return
+
+            results[name] = result
+
+            self._save()
+
+    def record_failure(self, signature: FileSignature, indexer: type[Indexer], filepath: SPathLike) -> None:
+        """Count a failure of the indexer on the file and record it as failing once it reached the threshold."""
+
+        with self._lock:
+            failures = self._failures.setdefault((self._get_key(signature), self._get_name(indexer)), set())
+
+            failures.add(str(SPath(filepath).resolve()))
+
+            if len(failures) >= max(self.fail_threshold, 1):
+                self.record(signature, indexer, 'fails')
+
+    def sort_indexers(self, signature: FileSignature, indexers: Iterable[IndexerT]) -> list[IndexerT]:
+        """Sort indexers as the ones known to work, the untried ones and lastly the ones known to fail."""
+
+        priority = {'works': 0, 'rgb24': 0, None: 1, 'fails': 2}
+
+        return sorted(indexers, key=lambda indexer: priority[self.get_result(signature, indexer)])
+
+    def clear(self, disk: bool = False) -> None:
+        with self._lock:
+            self._results.clear()
+            self._failures.clear()
+
+            if disk:
+                self._get_storage_path().unlink(missing_ok=True)
+
+
+indexer_capabilities = IndexerCapabilities()
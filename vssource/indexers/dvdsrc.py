@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import sys
+from array import array
 from typing import TYPE_CHECKING, Sequence
 
-from vstools import SPath, core, get_prop, vs
+from vstools import SPath, core, get_prop, remap_frames, vs
 
-from ..dataclasses import AllNeddedDvdFrameData
+from ..dataclasses import DVDSRCVTSData, PackedDvdFrameData
 from ..rff import apply_rff_array, apply_rff_video
 from .base import DVDIndexer
 
@@ -18,19 +20,24 @@ __all__ = [
 
 
 def get_sectorranges_for_vobcellpair(current_vts: IFOX, pair_id: tuple[int, int]) -> list[tuple[int, int]]:
-    return [
-        (e.start_sector, e.last_sector)
-        for e in current_vts.vts_c_adt.cell_adr_table
-        if (e.vob_id, e.cell_id) == pair_id
-    ]
+    return current_vts.vts_c_adt.get_sector_ranges(*pair_id)
 
 
 class DVDSRCIndexer(DVDIndexer):
+    def get_vts_data(
+        self, title_set_nr: int, target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath]
+    ) -> DVDSRCVTSData:
+        node = core.dvdsrc2.FullVts(str(self.iso_path), vts=title_set_nr)
+        staff = self._extract_data(node)
+
+        return DVDSRCVTSData(node, staff, self._get_vobid_frameset(staff.vobids))
+
     def parse_vts(
         self, title: IFO0Title, disable_rff: bool, vobidcellids_to_take: list[tuple[int, int]],
-        target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath]
-    ) -> tuple[vs.VideoNode, list[int], list[tuple[int, int]], list[int]]:
-        admap = target_vts.vts_vobu_admap
+        target_vts: IFOX, output_folder: SPath, vob_input_files: Sequence[SPath],
+        vts_data: DVDSRCVTSData | None = None
+    ) -> tuple[vs.VideoNode, Sequence[int], Sequence[tuple[int, int]], list[int]]:
+        admap_len = len(target_vts.vts_vobu_admap)
 
         all_ranges = [
             x for a in vobidcellids_to_take for x in get_sectorranges_for_vobcellpair(target_vts, a)
@@ -38,17 +45,24 @@ class DVDSRCIndexer(DVDIndexer):
 
         vts_indices = list[int]()
         for a in all_ranges:
-            start_index = admap.index(a[0])
+            start_index = target_vts.get_vobu_index(a[0])
 
             try:
-                end_index = admap.index(a[1] + 1) - 1
+                end_index = target_vts.get_vobu_index(a[1] + 1) - 1
             except ValueError:
-                end_index = len(admap) - 1
+                end_index = admap_len - 1
 
             vts_indices.extend([start_index, end_index])
 
-        rawnode = core.dvdsrc2.FullVts(str(self.iso_path), vts=title.title_set_nr, ranges=vts_indices)
-        staff = self._extract_data(rawnode)
+        if vts_data is None:
+            rawnode = core.dvdsrc2.FullVts(str(self.iso_path), vts=title.title_set_nr, ranges=vts_indices)
+            staff = self._extract_data(rawnode)
+        else:
+            # the title is cut out of the decoded whole VTS by the frames of its vob/cell ids
+            frameranges = [x for a in vobidcellids_to_take for x in vts_data.frameset[a]]
+
+            rawnode = remap_frames(vts_data.node, frameranges)
+            staff = vts_data.data.cut(frameranges)
 
         if not disable_rff:
             rnode = apply_rff_video(rawnode, staff.rff, staff.tff, staff.prog, staff.progseq)
@@ -59,24 +73,23 @@ class DVDSRCIndexer(DVDIndexer):
 
         return rnode, staff.rff, _vobids, vts_indices
 
-    def _extract_data(self, rawnode: vs.VideoNode) -> AllNeddedDvdFrameData:
-        dd = bytes(get_prop(rawnode, 'InfoFrame', vs.VideoFrame)[0])  # type: ignore
+    def _extract_data(self, rawnode: vs.VideoNode) -> PackedDvdFrameData:
+        dd = memoryview(get_prop(rawnode, 'InfoFrame', vs.VideoFrame)[0])  # type: ignore
+
+        if not dd.c_contiguous:
+            dd = memoryview(dd.tobytes())
+
+        dd = dd.cast('B')
 
         assert len(dd) == len(rawnode) * 4  # type: ignore
 
-        vobids = list[tuple[int, int]]()
-        tff = list[int]()
-        rff = list[int]()
-        prog = list[int]()
-        progseq = list[int]()
+        # Every frame is packed as status byte, big endian vob id, cell id
+        vob_bytes = bytearray(len(rawnode) * 2)
+        vob_bytes[0::2], vob_bytes[1::2] = dd[1::4], dd[2::4]
 
-        for i in range(len(rawnode)):
-            sb = dd[i * 4 + 0]
+        vob_ids = array('H', vob_bytes)
 
-            vobids += [((dd[i * 4 + 1] << 8) + dd[i * 4 + 2], dd[i * 4 + 3])]
-            tff += [(sb & (1 << 0)) >> 0]
-            rff += [(sb & (1 << 1)) >> 1]
-            prog += [(sb & (1 << 2)) >> 2]
-            progseq += [(sb & (1 << 3)) >> 3]
+        if sys.byteorder == 'little':
+            vob_ids.byteswap()
 
-        return AllNeddedDvdFrameData(vobids, tff, rff, prog, progseq)
+        return PackedDvdFrameData(dd[0::4].tobytes(), vob_ids, dd[3::4].tobytes())
@@ -1,8 +1,6 @@
 from __future__ import annotations
 
-from vstools import core
-
-from .base import Indexer
+from .base import Indexer, LazySourceFunc
 
 __all__ = [
     'BestSource',
@@ -20,28 +18,28 @@ __all__ = [
 class BestSource(Indexer):
     """BestSource indexer"""
 
-    _source_func = core.lazy.bs.VideoSource  # type: ignore
+    _source_func = LazySourceFunc('bs', 'VideoSource')
 
 
 class IMWRI(Indexer):
     """ImageMagick Writer-Reader indexer"""
 
-    _source_func = core.lazy.imwri.Read
+    _source_func = LazySourceFunc('imwri', 'Read')
 
 
 class LSMAS(Indexer):
     """L-SMASH-Works indexer"""
 
-    _source_func = core.lazy.lsmas.LWLibavSource
+    _source_func = LazySourceFunc('lsmas', 'LWLibavSource')
 
 
 class CarefulSource(Indexer):
     """CarefulSource indexer"""
 
-    _source_func = core.lazy.cs.ImageSource
+    _source_func = LazySourceFunc('cs', 'ImageSource')
 
 
 class FFMS2(Indexer):
     """FFmpegSource2 indexer"""
 
-    _source_func = core.lazy.ffms2.Source
+    _source_func = LazySourceFunc('ffms2', 'Source')
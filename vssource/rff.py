@@ -1,30 +1,117 @@
 from __future__ import annotations
 
 import warnings
-from copy import deepcopy
+from array import array
+from dataclasses import dataclass
 from itertools import count
+from operator import sub
 from typing import Sequence
 
-from vstools import CustomRuntimeError, T, flatten, remap_frames, vs
+from vstools import CustomValueError, T, core, flatten, vs
 
 __all__ = [
+    'FieldMap', 'build_field_map',
+
+    'FieldRun', 'compress_fields', 'remap_field_runs',
+
     'apply_rff_array', 'apply_rff_video',
     'cut_array_on_ranges'
 ]
 
 
+_INVERT_FIELD = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+# 24 -> 25 pal speedup pulldown repeats two fields every 24 frames, that is the longest cadence we expect
+_MAX_CADENCE = 50
+
+
+@dataclass
+class FieldMap:
+    """Flat per-field description of a stream after soft telecine has been applied."""
+
+    n: array[int]
+    tf: bytearray
+    prg: bytearray
+    repeat: bytearray
+
+    def __len__(self) -> int:
+        return len(self.n)
+
+
+def build_field_map(
+    rff: Sequence[int], tff: Sequence[int], prog: Sequence[int], prog_seq: Sequence[int]
+) -> FieldMap:
+    assert len(rff) == len(tff) == len(prog) == len(prog_seq)
+
+    fields = FieldMap(array('I'), bytearray(), bytearray(), bytearray())
+
+    n, tf, prg, repeat = fields.n, fields.tf, fields.prg, fields.repeat
+
+    for i, current_prg_seq, current_prg, current_rff, current_tff in zip(count(), prog_seq, prog, rff, tff):
+        current_tff = int(bool(current_tff))
+
+        if not current_prg_seq:
+            first_field = 2 * i + 1 - current_tff
+            second_field = 2 * i + current_tff
+
+            if current_rff:
+                assert current_prg
+
+                n.extend((first_field, second_field, first_field))
+                tf.extend((current_tff, 1 - current_tff, current_tff))
+                prg.extend(b'\x00\x00\x00')
+                repeat.extend(b'\x00\x00\x01')
+            else:
+                n.extend((first_field, second_field))
+                tf.extend((current_tff, 1 - current_tff))
+                prg.extend(b'\x00\x00')
+                repeat.extend(b'\x00\x00')
+        else:
+            assert current_prg
+
+            field_count = 1
+            if current_rff:
+                field_count += 1 + current_tff
+
+            n.extend((2 * i, 2 * i + 1) * field_count)
+            tf.extend(b'\x01\x00' * field_count)
+            prg.extend(b'\x01\x01' * field_count)
+            repeat.extend(b'\x00\x00' * field_count)
+
+    # assert (len(fields) % 2) == 0
+    if (len(fields) % 2) != 0:
+        warnings.warn('uneven amount of fields removing last\n')
+
+        for arr in (n, tf, prg, repeat):
+            arr.pop()
+
+    # Comparing the two halves is done in C, the slow path is only taken for broken streams
+    if tf[0::2] != tf[1::2].translate(_INVERT_FIELD):
+        for a in range(0, len(fields), 2):
+            if tf[a] == tf[a + 1]:
+                tf[a + 1] = 1 - tf[a + 1]
+
+                warnings.warn(f'Invalid field transition at {a // 2}')
+
+    return fields
+
+
 def apply_rff_array(old_array: Sequence[T], rff: Sequence[int], tff: Sequence[int], prog_seq: Sequence[int]) -> list[T]:
-    array_double_rate = list[T]()
+    array_single_rate = list[T]()
+    field_pos = 0
 
     for prog, arr, rffv, tffv in zip(prog_seq, old_array, rff, tff):
         repeat_amount = (3 if rffv else 2) if prog == 0 else ((6 if tffv else 4) if rffv else 2)
 
-        array_double_rate.extend([arr] * repeat_amount)
+        # Only the first field of every output frame is kept, so just count the even field positions
+        array_single_rate.extend([arr] * ((field_pos + repeat_amount + 1) // 2 - (field_pos + 1) // 2))
 
-    # assert (len(array_double_rate) % 2) == 0
-    if (len(array_double_rate) % 2) != 0:
+        field_pos += repeat_amount
+
+    # assert (field_pos % 2) == 0
+    if (field_pos % 2) != 0:
         warnings.warn('uneven amount of fields removing last\n')
-        array_double_rate = array_double_rate[:-1]
+        array_single_rate.pop()
 
     # It seems really weird thats its allowed to have rff stuff across
     # vob boundries even for multi angle stuff i have seen this so often though it is ok to remove the warnings
@@ -35,106 +122,177 @@ def apply_rff_array(old_array: Sequence[T], rff: Sequence[int], tff: Sequence[in
     #            'This probably just means telecine happened across chapters boundary.'
     #        )
 
-    return array_double_rate[::2]
+    return array_single_rate
 
 
-def apply_rff_video(
-    node: vs.VideoNode, rff: list[int], tff: list[int], prog: list[int], prog_seq: list[int]
-) -> vs.VideoNode:
-    assert len(node) == len(rff) == len(tff) == len(prog) == len(prog_seq)
+@dataclass
+class FieldRun:
+    """Source fields taken as `start + cycle * i + offset` for every cycle `i` and every offset."""
 
-    fields = list[dict[str, int]]()
-    tfffs = node.std.RemoveFrameProps(['_FieldBased', '_Field']).std.SeparateFields(True)
+    start: int
+    cycle: int
+    offsets: tuple[int, ...]
+    count: int
 
-    for i, current_prg_seq, current_prg, current_rff, current_tff in zip(count(), prog_seq, prog, rff, tff):
-        if not current_prg_seq:
-            if current_tff:
-                first_field = 2 * i
-                second_field = 2 * i + 1
-            else:
-                first_field = 2 * i + 1
-                second_field = 2 * i
+    def __len__(self) -> int:
+        return len(self.offsets) * self.count
 
-            fields += [
-                {'n': first_field, 'tf': current_tff, 'prg': False, 'repeat': False},
-                {'n': second_field, 'tf': not current_tff, 'prg': False, 'repeat': False}
-            ]
 
-            if current_rff:
-                assert current_prg
-                repeat_field = deepcopy(fields[-2])
-                repeat_field['repeat'] = True
-                fields.append(repeat_field)
-        else:
-            assert current_prg
+def compress_fields(fields: Sequence[int], max_cadence: int = _MAX_CADENCE) -> list[FieldRun]:
+    """
+    Compress a field remap into runs of constant cadence.
 
-            field_count = 1
-            if current_rff:
-                field_count += 1 + int(current_tff)
+    Soft telecine is almost always a repeating pattern, so the amount of runs
+    scales with the cadence breaks of the stream instead of its length.
+    Whatever can't be matched to a cadence is stored verbatim in between.
+    """
 
-            fields += [
-                {'n': 2 * i, 'tf': 1, 'prg': True, 'repeat': False},
-                {'n': 2 * i + 1, 'tf': 0, 'prg': True, 'repeat': False}
-            ] * field_count
+    fields = array('I', fields)
+    deltas = array('q', map(sub, fields[1:], fields[:-1]))
 
-    # TODO: mark known progressive frames as progressive
+    runs = list[FieldRun]()
+    literal_start = pos = 0
 
-    # assert (len(fields) % 2) == 0
-    if (len(fields) % 2) != 0:
-        warnings.warn('uneven amount of fields removing last\n')
-        fields = fields[:-1]
+    def _flush_literal(end: int) -> None:
+        if end > literal_start:
+            chunk = fields[literal_start:end]
+            base = min(chunk)
+            runs.append(FieldRun(base, max(chunk) - base + 1, tuple(x - base for x in chunk), 1))
 
-    for a, tf, bf in zip(count(), fields[::2], fields[1::2]):
-        if tf['tf'] == bf['tf']:
-            bf['tf'] = not bf['tf']
+    while pos < len(fields):
+        if not (run := _find_cadence(fields, deltas, pos, max_cadence)):
+            pos += 1
+            continue
 
-            warnings.warn(f'Invalid field transition at {a}')
+        _flush_literal(pos)
+        runs.append(run)
 
-    for fcurr, fnext in zip(fields[::2], fields[1::2]):
-        if fcurr['tf'] == fnext['tf']:
-            raise CustomRuntimeError(
-                f'Found invalid stream with two consecutive {"top" if fcurr["tf"] else "bottom"} fields!'
-            )
+        pos += len(run)
+        literal_start = pos
 
-    final = remap_frames(tfffs, [x['n'] for x in fields])
+    _flush_literal(len(fields))
 
-    def _set_field(n: int, f: vs.VideoFrame) -> vs.VideoFrame:
-        f = f.copy()
+    return runs
 
-        f.props.pop('_FieldBased', None)
-        f.props._Field = fields[n]['tf']
 
-        return f
+def _find_cadence(fields: array[int], deltas: array[int], pos: int, max_cadence: int) -> FieldRun | None:
+    best: FieldRun | None = None
 
-    final = final.std.ModifyFrame(final, _set_field)
+    for period in range(1, max_cadence + 1):
+        if pos + period * 2 > len(fields):
+            break
 
-    woven = final.std.DoubleWeave()[::2]
+        # A pattern is repeating if the deltas between the fields are, this way all the comparisons are done in C
+        if deltas[pos:pos + period - 1] != deltas[pos + period:pos + period * 2 - 1]:
+            continue
 
-    def _set_repeat(n: int, f: vs.VideoFrame) -> vs.VideoFrame:
-        f = f.copy()
-        if fields[n * 2]['repeat']:
-            f.props['RepeatedField'] = 1
-        elif fields[n * 2 + 1]['repeat']:
-            f.props['RepeatedField'] = 0
+        cycles = 2
+
+        while pos + period * (cycles + 1) <= len(fields) and (
+            deltas[pos + period * (cycles - 1) - 1:pos + period * cycles - 1]
+            == deltas[pos + period * cycles - 1:pos + period * (cycles + 1) - 1]
+        ):
+            cycles += 1
+
+        if best and len(best) >= period * cycles:
+            continue
+
+        if (step := fields[pos + period] - fields[pos]) <= 0:
+            continue
+
+        base = min(fields[pos:pos + period])
+
+        best = FieldRun(base, step, tuple(x - base for x in fields[pos:pos + period]), cycles)
+
+        # longer periods can't cover more than the rest of the fields, flat streams match every period
+        if pos + len(best) == len(fields):
+            break
+
+    return best
+
+
+def remap_field_runs(clip: vs.VideoNode, runs: Sequence[FieldRun]) -> vs.VideoNode:
+    if not runs:
+        raise CustomValueError('There are no fields to remap!', remap_field_runs)
+
+    clips = list[vs.VideoNode]()
+
+    for run in runs:
+        end = run.start + run.cycle * run.count
+
+        if run.offsets == tuple(range(run.cycle)):
+            clips.append(clip[run.start:end])
+        elif run.cycle == 1:
+            # SelectEvery needs a cycle of at least two, every offset is a plain slice here
+            clips.append(core.std.Interleave([
+                clip[run.start + offset:run.start + offset + run.count] for offset in run.offsets
+            ], modify_duration=False))
+        elif max(run.offsets) < run.cycle and end <= len(clip):
+            clips.append(clip[run.start:end].std.SelectEvery(run.cycle, run.offsets, modify_duration=False))
         else:
-            f.props['RepeatedField'] = -1
+            # Pairs reordered across the cycle boundary, take every offset with its own stride
+            clips.append(core.std.Interleave([
+                clip[run.start + offset:run.start + offset + run.cycle * (run.count - 1) + 1].std.SelectEvery(
+                    run.cycle, 0, modify_duration=False
+                )
+                for offset in run.offsets
+            ], modify_duration=False))
+
+    return clips[0] if len(clips) == 1 else core.std.Splice(clips)
+
+
+def apply_rff_video(
+    node: vs.VideoNode, rff: Sequence[int], tff: Sequence[int], prog: Sequence[int], prog_seq: Sequence[int]
+) -> vs.VideoNode:
+    assert len(node) == len(rff) == len(tff) == len(prog) == len(prog_seq)
+
+    fields = build_field_map(rff, tff, prog, prog_seq)
+
+    # TODO: mark known progressive frames as progressive
+
+    woven_fields, repeated, field_based = _weave_fields(fields)
+
+    tfffs = node.std.RemoveFrameProps(['_FieldBased', '_Field']).std.SeparateFields(True)
+    tfffs = tfffs.std.RemoveFrameProps('_Field')
+
+    woven = remap_field_runs(tfffs, compress_fields(woven_fields)).std.DoubleWeave(True)[::2]
+
+    def _set_props(n: int, f: vs.VideoFrame) -> vs.VideoFrame:
+        f = f.copy()
+
+        f.props.RepeatedField = repeated[n]
+        f.props._FieldBased = field_based[n]
+
         return f
 
-    woven = woven.std.ModifyFrame(woven, _set_repeat)
+    return woven.std.ModifyFrame(woven, _set_props)
+
+
+def _weave_fields(fields: FieldMap) -> tuple[array[int], array[int], bytearray]:
+    # Every pair gets reordered to top field first so DoubleWeave can weave with a fixed field order
+    # instead of needing a _Field prop written on every single field.
+    # The real field order is kept in the _FieldBased written afterwards together with RepeatedField.
+    woven_fields = array('I', fields.n)
+    repeated = array('b', [-1]) * (len(fields) // 2)
+    field_based = bytearray(b'\x02') * (len(fields) // 2)
 
-    # TODO: this seems to not work or atleast useless since its disable for non progressive sequence which is rare
-    def _update_progressive(n: int, f: vs.VideoFrame) -> vs.VideoFrame:
-        fout = f.copy()
+    n, tf, prg, repeat = fields.n, fields.tf, fields.prg, fields.repeat
 
-        tf = fields[n * 2]
-        bf = fields[n * 2 + 1]
+    for i, a in enumerate(range(0, len(fields), 2)):
+        if not tf[a]:
+            woven_fields[a], woven_fields[a + 1] = n[a + 1], n[a]
+            field_based[i] = 1
 
-        if tf['prg'] and bf['prg']:
-            fout.props['_FieldBased'] = 0
+        # TODO: this seems to not work or atleast useless since its disable for non progressive sequence which is rare
+        if prg[a] and prg[a + 1]:
+            field_based[i] = 0
 
-        return fout
+        if repeat[a]:
+            repeated[i] = 1
+        elif repeat[a + 1]:
+            repeated[i] = 0
 
-    return woven.std.ModifyFrame(woven, _update_progressive)
+    return woven_fields, repeated, field_based
 
 
 def cut_array_on_ranges(array: list[T], ranges: list[tuple[int, int]]) -> list[T]: